@@ -1,12 +1,12 @@
 import logging
-from aiogram import Dispatcher, types
-from aiogram.filters import Command
+from aiogram import types
 from aiogram.fsm.context import FSMContext
-from aiogram.exceptions import TelegramForbiddenError
 from states.admin import AdminState
 from database import Database
 import config
 from handlers.user_handlers import send_main_menu
+from middlewares import UserContext
+from routing import ButtonRouter
 
 logger = logging.getLogger(__name__)
 
@@ -20,8 +20,9 @@ def get_admin_menu_keyboard():
         one_time_keyboard=True
     )
 
-def register_admin_handlers(dp: Dispatcher, db: Database, bot):
-    @dp.message(lambda message: message.text and message.text.lower() == config.ADMIN_ENTRY_PHRASE.lower())
+def register_admin_handlers(routes: ButtonRouter, db: Database, bot, broadcast_engine):
+
+    @routes.button(config.ADMIN_ENTRY_PHRASE, ignore_case=True)
     async def process_admin_entry(message: types.Message, state: FSMContext):
         current_state = await state.get_state()
         if current_state is None:
@@ -30,7 +31,7 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
             await message.answer("Введіть пароль для адмінпанелі:")
             await state.set_state(AdminState.password)
 
-    @dp.message(AdminState.password)
+    @routes.any(AdminState.password)
     async def process_admin_password(message: types.Message, state: FSMContext):
         if message.text == config.ADMIN_PASSWORD:
             await message.answer("Вітаю, ви в адмінпанелі!", reply_markup=get_admin_menu_keyboard())
@@ -39,8 +40,8 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
             await message.answer("Неправильний пароль. Спробуйте ще раз.")
             await state.set_state(AdminState.password)
 
-    @dp.message(lambda message: message.text in ["Розсилка 📢", "Змінити статус команди 🔄", "Змінити стан події ⚙️", "Вихід з адмінпанелі 🚪"], AdminState.main)
-    async def process_admin_menu(message: types.Message, state: FSMContext):
+    @routes.button("Розсилка 📢", "Змінити статус команди 🔄", "Змінити стан події ⚙️", "Вихід з адмінпанелі 🚪", state=AdminState.main)
+    async def process_admin_menu(message: types.Message, state: FSMContext, user_ctx: UserContext):
         if message.text == "Розсилка 📢":
             await message.answer("Введіть текст для розсилки:")
             await state.set_state(AdminState.broadcast)
@@ -61,40 +62,21 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
             await state.set_state(AdminState.event_state)
         elif message.text == "Вихід з адмінпанелі 🚪":
             await state.clear()
-            await send_main_menu(message, state, db, registered=db.is_user_registered(message.from_user.id), name=db.get_user_data(message.from_user.id))
+            await send_main_menu(message, state, user_ctx)
 
-    @dp.message(AdminState.main)
+    @routes.any(AdminState.main)
     async def process_invalid_admin_menu(message: types.Message, state: FSMContext):
         await message.answer("Вітаю, ви в адмінпанелі!\n‼️ Будь ласка, вибери один із варіантів нижче!", reply_markup=get_admin_menu_keyboard())
 
-    @dp.message(AdminState.broadcast)
+    @routes.any(AdminState.broadcast)
     async def process_broadcast_text(message: types.Message, state: FSMContext):
-        broadcast_text = message.text
-        try:
-            participants = db.get_participants()
-            failed_count = 0
-            for participant in participants:
-                if "chat_id" in participant:
-                    try:
-                        await bot.send_message(
-                            chat_id=participant["chat_id"],
-                            text=broadcast_text,
-                            parse_mode="Markdown"
-                        )
-                    except TelegramForbiddenError:
-                        logger.warning(f"User {participant['user_id']} blocked the bot, skipping.")
-                        failed_count += 1
-                    except Exception as e:
-                        logger.error(f"Error sending broadcast to user {participant['user_id']}: {e}")
-                        failed_count += 1
-            await message.answer(f"Розсилка завершена. Успішно надіслано: {len(participants) - failed_count}/{len(participants)}.")
-        except Exception as e:
-            logger.error(f"Error during broadcast: {e}")
-            await message.answer("Виникла помилка під час розсилки.")
+        broadcast_engine.start(message.text, message.chat.id)
+        logger.info(f"Broadcast started by admin {message.from_user.id}")
+        await message.answer("Розсилку розпочато у фоновому режимі. Я повідомлю про прогрес і результат.")
         await message.answer("Вітаю, ви в адмінпанелі!", reply_markup=get_admin_menu_keyboard())
         await state.set_state(AdminState.main)
 
-    @dp.message(Command("set_team_status"), AdminState.team_status)
+    @routes.command("set_team_status", state=AdminState.team_status)
     async def set_team_status(message: types.Message, state: FSMContext):
         user_id = message.from_user.id
         if user_id not in config.ADMIN_ID:
@@ -120,11 +102,7 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
         test_task_status = test_task_status_str == "true"
         is_participant = is_participant_str == "true"
         try:
-            result = db.teams.update_one(
-                {"team_name": team_name, "category": "CTF2025"},
-                {"$set": {"test_task_status": test_task_status, "is_participant": is_participant}}
-            )
-            if result.matched_count == 0:
+            if not await db.set_team_status_by_name(team_name, test_task_status, is_participant):
                 await message.answer(f"Команду {team_name} не знайдено! 😢")
             else:
                 await message.answer(
@@ -138,7 +116,7 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
         await message.answer("Вітаю, ви в адмінпанелі!", reply_markup=get_admin_menu_keyboard())
         await state.set_state(AdminState.main)
 
-    @dp.message(Command("set_event_state"), AdminState.event_state)
+    @routes.command("set_event_state", state=AdminState.event_state)
     async def set_event_state(message: types.Message, state: FSMContext):
         user_id = message.from_user.id
         if user_id not in config.ADMIN_ID:
@@ -164,11 +142,7 @@ def register_admin_handlers(dp: Dispatcher, db: Database, bot):
             )
             return
         try:
-            db.event_state.update_one(
-                {"event_id": "CTF2025"},
-                {"$set": {"current_state": new_state}},
-                upsert=True
-            )
+            await db.set_event_state(new_state)
             await message.answer(f"Стан події оновлено: {new_state} ⚙️")
             logger.info(f"Event state updated to {new_state} by admin {user_id}")
         except Exception as e:
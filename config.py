@@ -5,12 +5,48 @@ load_dotenv()
 
 BOT_TOKEN = os.getenv("BOT_TOKEN")
 MONGODB_URI = os.getenv("MONGODB_URI")
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "mongo")
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+BOT_WORKERS = int(os.getenv("BOT_WORKERS", "1"))
+WEBHOOK_URL = os.getenv("WEBHOOK_URL")
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
 ADMIN_ID = [int(id) for id in os.getenv("ADMIN_ID").split(",") if id.strip()]
 ADMIN_ENTRY_PHRASE = os.getenv("ADMIN_ENTRY_PHRASE")
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
 PARTICIPANTS_CHAT_LINK = os.getenv("PARTICIPANTS_CHAT_LINK")
 ORGANIZER_CONTACT = os.getenv("ORGANIZER_CONTACT")
 ASSETS_PATH = os.getenv("ASSETS_PATH", "assets")
+ASSETS_POLL_INTERVAL = float(os.getenv("ASSETS_POLL_INTERVAL", "5"))
+ASSETS_CACHE_PATH = os.getenv("ASSETS_CACHE_PATH", ".asset_cache")
+ASSETS_MAX_BYTES = int(os.getenv("ASSETS_MAX_BYTES", "200000"))
+OPTIMIZE_ASSETS = os.getenv("OPTIMIZE_ASSETS", "true").lower() == "true"
+EVENT_STATE_TTL = float(os.getenv("EVENT_STATE_TTL", "5"))
+THROTTLE_RATE = float(os.getenv("THROTTLE_RATE", "1"))
+THROTTLE_BURST = int(os.getenv("THROTTLE_BURST", "5"))
+THROTTLE_GROUP_LIMITS = {
+    group.strip(): (float(limit.split("/", 1)[0]), int(limit.split("/", 1)[1]))
+    for group, limit in (item.split("=", 1) for item in os.getenv("THROTTLE_GROUP_LIMITS", "TeamJoin=0.5/4,AdminState=0.5/4").split(",") if item.strip())
+}
+USER_LOCK_MAX_USERS = int(os.getenv("USER_LOCK_MAX_USERS", "10000"))
+METRICS_INTERVAL = float(os.getenv("METRICS_INTERVAL", "60"))
+FSM_STATE_TTL = float(os.getenv("FSM_STATE_TTL", "604800"))
+FSM_SWEEP_INTERVAL = float(os.getenv("FSM_SWEEP_INTERVAL", "60"))
+FSM_REVALIDATE = os.getenv("FSM_REVALIDATE", "true" if BOT_MODE == "webhook" and BOT_WORKERS == 1 else "false").lower() == "true"
+FSM_GROUP_TTLS = {
+    group.strip(): float(ttl)
+    for group, ttl in (item.split("=", 1) for item in os.getenv("FSM_GROUP_TTLS", "Registration=172800,TeamCreation=86400,TeamJoin=86400,TeamLeaveConfirm=3600").split(",") if item.strip())
+}
+DB_BATCH_SIZE = int(os.getenv("DB_BATCH_SIZE", "500"))
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
+TELEGRAM_CHAT_BURST = int(os.getenv("TELEGRAM_CHAT_BURST", "3"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "10"))
+BROADCAST_LEASE = float(os.getenv("BROADCAST_LEASE", "60"))
+BROADCAST_MAX_ATTEMPTS = int(os.getenv("BROADCAST_MAX_ATTEMPTS", "3"))
 
 print("BOT_TOKEN in config:", BOT_TOKEN)
 print("MONGODB_URI in config:", MONGODB_URI)
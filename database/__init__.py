@@ -1 +1,6 @@
-from .db import Database
\ No newline at end of file
+from .base import Database
+from .db import MongoDatabase
+from .memory import MemoryDatabase
+from .factory import create_database
+from .fsm_storage import CachedFSMStorage
+from .models import ParticipantSummary, TeamStatus
\ No newline at end of file
@@ -0,0 +1,165 @@
+from abc import ABC, abstractmethod
+
+EVENT_STATES = ["registration", "test_task", "main_task", "finished"]
+UNFINISHED_BROADCAST_STATES = ["preparing", "sending"]
+MAX_TEAM_MEMBERS = 4
+
+class Database(ABC):
+    async def init(self):
+        pass
+
+    async def migrate(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def watch_event_state(self):
+        pass
+
+    async def suppress_chat(self, chat_id):
+        await self.set_chat_blocked(chat_id, True)
+
+    async def unsuppress_chat(self, chat_id):
+        await self.set_chat_blocked(chat_id, False)
+
+    @abstractmethod
+    async def is_user_registered(self, user_id): ...
+
+    @abstractmethod
+    async def is_user_in_team(self, user_id): ...
+
+    @abstractmethod
+    async def create_team(self, team_name, user_id, password=None): ...
+
+    @abstractmethod
+    async def join_team(self, team_name, user_id, password=None): ...
+
+    async def add_team(self, team_name, user_id, password=None):
+        team = await self.join_team(team_name, user_id, password)
+        if team is None:
+            team = await self.create_team(team_name, user_id, password)
+        return (team["_id"], True) if team else (None, False)
+
+    @abstractmethod
+    async def add_participant(self, user_id, name, age, university, specialty, course, source, phone, data_consent, team_id, chat_id): ...
+
+    @abstractmethod
+    async def leave_team(self, user_id): ...
+
+    @abstractmethod
+    async def team_exists(self, team_name): ...
+
+    @abstractmethod
+    async def set_data_consent(self, user_id, data_consent): ...
+
+    @abstractmethod
+    async def get_user_data(self, user_id): ...
+
+    @abstractmethod
+    async def get_team_view(self, user_id): ...
+
+    @abstractmethod
+    async def get_user_context(self, user_id): ...
+
+    @abstractmethod
+    async def get_teams(self): ...
+
+    @abstractmethod
+    async def get_participants(self): ...
+
+    @abstractmethod
+    def iter_teams(self, projection=None, batch_size=None): ...
+
+    @abstractmethod
+    def iter_participants(self, projection=None, batch_size=None, reachable_only=False): ...
+
+    @abstractmethod
+    async def delete_participant(self, user_id): ...
+
+    @abstractmethod
+    async def save_cv(self, user_id, file_id, file_name): ...
+
+    @abstractmethod
+    async def get_cv(self, user_id): ...
+
+    @abstractmethod
+    async def delete_admin_collection(self): ...
+
+    @abstractmethod
+    async def set_team_participant_status(self, team_id, status): ...
+
+    @abstractmethod
+    async def set_team_test_task_status(self, team_id, status): ...
+
+    @abstractmethod
+    async def set_team_status_by_name(self, team_name, test_task_status, is_participant): ...
+
+    @abstractmethod
+    async def get_team_status(self, team_id): ...
+
+    @abstractmethod
+    async def set_event_state(self, state): ...
+
+    @abstractmethod
+    async def get_event_state(self): ...
+
+    @abstractmethod
+    async def get_member_chat_ids(self, user_ids): ...
+
+    @abstractmethod
+    async def set_chat_blocked(self, chat_id, blocked): ...
+
+    @abstractmethod
+    async def get_asset_file_id(self, content_hash, kind): ...
+
+    @abstractmethod
+    async def save_asset_file_id(self, content_hash, kind, name, file_id): ...
+
+    @abstractmethod
+    async def delete_asset_file_id(self, content_hash, kind): ...
+
+    @abstractmethod
+    async def create_broadcast_job(self, text, admin_chat_id, owner=None, lease_until=None): ...
+
+    @abstractmethod
+    async def claim_broadcast_job(self, job_id, owner, lease_until): ...
+
+    @abstractmethod
+    async def renew_broadcast_lease(self, job_id, owner, lease_until): ...
+
+    @abstractmethod
+    async def release_broadcast_job(self, job_id, owner): ...
+
+    @abstractmethod
+    async def reset_broadcast_recipients(self, job_id): ...
+
+    @abstractmethod
+    async def add_broadcast_recipients(self, job_id, recipients): ...
+
+    @abstractmethod
+    async def start_broadcast_job(self, job_id, total, failed): ...
+
+    @abstractmethod
+    def iter_pending_broadcast_recipients(self, job_id, batch_size=None): ...
+
+    @abstractmethod
+    async def update_broadcast_progress(self, job_id, delivered, failed): ...
+
+    @abstractmethod
+    async def finish_broadcast_job(self, job_id): ...
+
+    @abstractmethod
+    async def fail_broadcast_job(self, job_id, error): ...
+
+    @abstractmethod
+    async def get_unfinished_broadcast_jobs(self): ...
+
+    @abstractmethod
+    async def get_fsm_record(self, key): ...
+
+    @abstractmethod
+    async def get_fsm_version(self, key): ...
+
+    @abstractmethod
+    async def save_fsm_records(self, records): ...
\ No newline at end of file
@@ -1,72 +1,132 @@
-from pymongo import MongoClient
-from datetime import datetime
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, ReturnDocument, UpdateMany, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
+from datetime import datetime, timezone
+import asyncio
+import time
+from database.migrations import run_migrations
+from database.query_counter import CountedCollection
+from database.models import ParticipantSummary, TeamStatus
+from database.base import Database, EVENT_STATES, MAX_TEAM_MEMBERS, UNFINISHED_BROADCAST_STATES
 import logging
 
 logger = logging.getLogger(__name__)
 
-class Database:
-    def __init__(self, mongo_uri):
+class MongoDatabase(Database):
+    def __init__(self, mongo_uri, event_state_ttl=5.0, batch_size=500):
+        super().__init__()
+        self.event_state_ttl = event_state_ttl
+        self.batch_size = batch_size
+        self._event_state = None
+        self._event_state_loaded_at = 0.0
+        self._event_state_watched = False
         try:
-            self.client = MongoClient(mongo_uri)
+            self.client = AsyncIOMotorClient(mongo_uri)
             self.db = self.client["ctf-2025-bot"]
-            self.participants = self.db["participants"]
-            self.teams = self.db["teams"]
-            self.cv = self.db["cv"]
-            self.event_state = self.db["event_state"]
-            if self.event_state.count_documents({"event_id": "CTF2025"}) == 0:
-                self.event_state.insert_one({"event_id": "CTF2025", "current_state": "registration"})
+            self.participants = CountedCollection(self.db["participants"])
+            self.teams = CountedCollection(self.db["teams"])
+            self.cv = CountedCollection(self.db["cv"])
+            self.event_state = CountedCollection(self.db["event_state"])
+            self.asset_cache = CountedCollection(self.db["asset_cache"])
+            self.broadcast_jobs = CountedCollection(self.db["broadcast_jobs"])
+            self.broadcast_recipients = CountedCollection(self.db["broadcast_recipients"])
+            self.fsm_states = CountedCollection(self.db["fsm_states"])
+            self.migrations = self.db["migrations"]
+        except Exception as e:
+            logger.error(f"Failed to connect to MongoDB: {e}")
+            raise
+
+    async def init(self):
+        try:
+            if await self.event_state.count_documents({"event_id": "CTF2025"}) == 0:
+                await self.event_state.insert_one({"event_id": "CTF2025", "current_state": "registration"})
             logger.info("Connected to MongoDB")
         except Exception as e:
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
 
-    def is_user_registered(self, user_id):
+    async def migrate(self):
+        try:
+            await run_migrations(self)
+        except Exception as e:
+            logger.error(f"Failed to apply migrations: {e}")
+            raise
+
+    def close(self):
+        self.client.close()
+
+    async def is_user_registered(self, user_id):
         try:
-            return self.participants.find_one({"user_id": user_id}) is not None
+            return await self.participants.find_one({"user_id": user_id}, {"_id": 1}) is not None
         except Exception as e:
             logger.error(f"Error checking user registration for {user_id}: {e}")
             return False
 
-    def is_user_in_team(self, user_id):
+    async def is_user_in_team(self, user_id):
         try:
-            participant = self.participants.find_one({"user_id": user_id})
+            participant = await self.participants.find_one({"user_id": user_id}, {"_id": 0, "team_id": 1})
             return participant is not None and participant.get("team_id") is not None
         except Exception as e:
             logger.error(f"Error checking team status for user {user_id}: {e}")
             return False
 
-    def add_team(self, team_name, user_id, password=None):
+    async def _link_participant_to_team(self, user_id, team_id):
+        result = await self.participants.update_one({"user_id": user_id, "team_id": None}, {"$set": {"team_id": team_id}})
+        return result.matched_count == 1
+
+    async def create_team(self, team_name, user_id, password=None):
         try:
-            team = self.teams.find_one({"team_name": team_name})
-            if team:
-                if len(team["members"]) >= 4:
-                    return None, False
-                if team.get("password") and team["password"] != password:
-                    return None, False
-                team_id = team["_id"]
-                self.teams.update_one({"_id": team_id}, {"$push": {"members": user_id}})
-                logger.info(f"User {user_id} added to existing team {team_name}")
-                return team_id, True
-            else:
-                team_data = {
+            team_data = {
+                "team_name": team_name,
+                "category": "CTF2025",
+                "members": [user_id],
+                "is_participant": False,
+                "test_task_status": False
+            }
+            if password:
+                team_data["password"] = password
+            team_result = await self.teams.insert_one(team_data)
+            team_data["_id"] = team_result.inserted_id
+            if not await self._link_participant_to_team(user_id, team_data["_id"]):
+                await self.teams.delete_one({"_id": team_data["_id"]})
+                logger.warning(f"User {user_id} is already in a team, rolled back creation of {team_name}")
+                return None
+            logger.info(f"Created new team {team_name} for user {user_id}")
+            return team_data
+        except DuplicateKeyError:
+            logger.info(f"Team {team_name} already exists, user {user_id} cannot create it")
+            return None
+        except Exception as e:
+            logger.error(f"Error creating team for {user_id}: {e}")
+            return None
+
+    async def join_team(self, team_name, user_id, password=None):
+        try:
+            team = await self.teams.find_one_and_update(
+                {
                     "team_name": team_name,
-                    "category": "CTF2025",
-                    "members": [user_id],
-                    "is_participant": False,
-                    "test_task_status": False
-                }
-                if password:
-                    team_data["password"] = password
-                team_result = self.teams.insert_one(team_data)
-                logger.info(f"Created new team {team_name} for user {user_id}")
-                return team_result.inserted_id, True
-        except Exception as e:
-            logger.error(f"Error adding team for {user_id}: {e}")
-            return None, False
-
-    def add_participant(self, user_id, name, age, university, specialty, course, source, phone, data_consent, team_id, chat_id):
-        try:
-            self.participants.insert_one({
+                    "password": {"$in": [password, None]},
+                    f"members.{MAX_TEAM_MEMBERS - 1}": {"$exists": False},
+                    "members": {"$ne": user_id}
+                },
+                {"$push": {"members": user_id}},
+                return_document=ReturnDocument.AFTER
+            )
+            if not team:
+                return None
+            if not await self._link_participant_to_team(user_id, team["_id"]):
+                await self.teams.update_one({"_id": team["_id"]}, {"$pull": {"members": user_id}})
+                logger.warning(f"User {user_id} is already in a team, rolled back joining {team_name}")
+                return None
+            logger.info(f"User {user_id} added to existing team {team_name}")
+            return team
+        except Exception as e:
+            logger.error(f"Error joining team for {user_id}: {e}")
+            return None
+
+    async def add_participant(self, user_id, name, age, university, specialty, course, source, phone, data_consent, team_id, chat_id):
+        try:
+            await self.participants.insert_one({
                 "user_id": user_id,
                 "name": name,
                 "age": age,
@@ -85,13 +145,13 @@ class Database:
             logger.error(f"Failed to add participant {user_id}: {e}")
             raise
 
-    def leave_team(self, user_id):
+    async def leave_team(self, user_id):
         try:
-            participant = self.participants.find_one({"user_id": user_id})
+            participant = await self.participants.find_one({"user_id": user_id})
             if participant and participant.get("team_id"):
                 team_id = participant["team_id"]
-                self.teams.update_one({"_id": team_id}, {"$pull": {"members": user_id}})
-                self.participants.update_one({"user_id": user_id}, {"$set": {"team_id": None}})
+                await self.teams.update_one({"_id": team_id}, {"$pull": {"members": user_id}})
+                await self.participants.update_one({"user_id": user_id}, {"$set": {"team_id": None}})
                 logger.info(f"User {user_id} left team {team_id}")
                 return True
             return False
@@ -99,34 +159,116 @@ class Database:
             logger.error(f"Error leaving team for user {user_id}: {e}")
             return False
 
-    def get_user_data(self, user_id):
+    async def team_exists(self, team_name):
+        try:
+            return await self.teams.find_one({"team_name": team_name}, {"_id": 1}) is not None
+        except Exception as e:
+            logger.error(f"Error checking team {team_name}: {e}")
+            return False
+
+    async def set_data_consent(self, user_id, data_consent):
         try:
-            participant = self.participants.find_one({"user_id": user_id})
+            await self.participants.update_one({"user_id": user_id}, {"$set": {"data_consent": data_consent}})
+            logger.info(f"Updated data_consent for user {user_id}")
+        except Exception as e:
+            logger.error(f"Failed to update data_consent for user {user_id}: {e}")
+            raise
+
+    async def get_user_data(self, user_id):
+        try:
+            participant = await self.participants.find_one({"user_id": user_id}, {"_id": 0, "name": 1})
             return participant["name"] if participant else "друже"
         except Exception as e:
             logger.error(f"Error getting user data for {user_id}: {e}")
             return "друже"
 
-    def get_teams(self):
+    def _team_view_pipeline(self, match):
+        return [
+            {"$match": match},
+            {"$limit": 1},
+            {"$lookup": {"from": "teams", "localField": "team_id", "foreignField": "_id", "as": "team"}},
+            {"$unwind": {"path": "$team", "preserveNullAndEmptyArrays": True}},
+            {"$lookup": {"from": "participants", "localField": "team.members", "foreignField": "user_id", "as": "member_docs"}},
+            {"$project": {
+                "user_id": 1, "name": 1, "chat_id": 1, "team_id": 1,
+                "team._id": 1, "team.team_name": 1, "team.members": 1, "team.is_participant": 1, "team.test_task_status": 1,
+                "member_docs.user_id": 1, "member_docs.name": 1, "member_docs.chat_id": 1
+            }}
+        ]
+
+    def _build_team_view(self, doc):
+        team = doc.get("team")
+        if not doc.get("team_id") or not team:
+            return None
+        order = {member_id: index for index, member_id in enumerate(team["members"])}
+        member_details = sorted(doc.get("member_docs", []), key=lambda member: order.get(member["user_id"], len(order)))
+        return {
+            "_id": team["_id"],
+            "team_name": team["team_name"],
+            "members": team["members"],
+            "member_details": [{key: member[key] for key in ("user_id", "name", "chat_id") if key in member} for member in member_details],
+            "status": TeamStatus(team.get("is_participant", False), team.get("test_task_status", False))
+        }
+
+    def _build_participant_summary(self, doc):
+        return ParticipantSummary(doc["user_id"], doc.get("name", "друже"), doc.get("team_id"), doc.get("chat_id"))
+
+    async def get_team_view(self, user_id):
         try:
-            return list(self.teams.find())
+            result = await self.participants.aggregate(self._team_view_pipeline({"user_id": user_id, "team_id": {"$ne": None}})).to_list(length=1)
+            return self._build_team_view(result[0]) if result else None
+        except Exception as e:
+            logger.error(f"Error getting team view for user {user_id}: {e}")
+            return None
+
+    async def get_user_context(self, user_id):
+        try:
+            result = await self.participants.aggregate(self._team_view_pipeline({"user_id": user_id})).to_list(length=1)
+            if not result:
+                return None, None
+            doc = result[0]
+            return self._build_participant_summary(doc), self._build_team_view(doc)
+        except Exception as e:
+            logger.error(f"Error getting user context for {user_id}: {e}")
+            return None, None
+
+    async def get_teams(self):
+        try:
+            return await self.teams.find().to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting teams: {e}")
             return []
 
-    def get_participants(self):
+    async def get_participants(self):
         try:
-            return list(self.participants.find())
+            return await self.participants.find().to_list(length=None)
         except Exception as e:
             logger.error(f"Error getting participants: {e}")
             return []
 
-    def delete_participant(self, user_id):
+    async def iter_teams(self, projection=None, batch_size=None):
+        try:
+            async for team in self.teams.find({}, projection, batch_size=batch_size or self.batch_size):
+                yield team
+        except Exception as e:
+            logger.error(f"Error iterating teams: {e}")
+            raise
+
+    async def iter_participants(self, projection=None, batch_size=None, reachable_only=False):
+        query = {"blocked": {"$ne": True}} if reachable_only else {}
         try:
-            participant = self.participants.find_one({"user_id": user_id})
+            async for participant in self.participants.find(query, projection, batch_size=batch_size or self.batch_size):
+                yield participant
+        except Exception as e:
+            logger.error(f"Error iterating participants: {e}")
+            raise
+
+    async def delete_participant(self, user_id):
+        try:
+            participant = await self.participants.find_one({"user_id": user_id})
             if participant:
-                self.teams.update_one({"_id": participant["team_id"]}, {"$pull": {"members": user_id}})
-                self.participants.delete_one({"user_id": user_id})
+                await self.teams.update_one({"_id": participant["team_id"]}, {"$pull": {"members": user_id}})
+                await self.participants.delete_one({"user_id": user_id})
                 logger.info(f"Deleted participant {user_id} from DB")
                 return True
             return False
@@ -134,9 +276,9 @@ class Database:
             logger.error(f"Error deleting participant {user_id}: {e}")
             return False
 
-    def save_cv(self, user_id, file_id, file_name):
+    async def save_cv(self, user_id, file_id, file_name):
         try:
-            self.cv.update_one(
+            await self.cv.update_one(
                 {"user_id": user_id},
                 {"$set": {"file_id": file_id, "file_name": file_name, "upload_date": datetime.now().isoformat()}},
                 upsert=True
@@ -146,65 +288,314 @@ class Database:
             logger.error(f"Error saving CV for user {user_id}: {e}")
             raise
 
-    def get_cv(self, user_id):
+    async def get_cv(self, user_id):
         try:
-            cv = self.cv.find_one({"user_id": user_id})
+            cv = await self.cv.find_one({"user_id": user_id})
             return cv if cv else None
         except Exception as e:
             logger.error(f"Error retrieving CV for user {user_id}: {e}")
             return None
 
-    def delete_admin_collection(self):
+    async def delete_admin_collection(self):
         try:
-            self.db["admin"].drop()
+            await self.db["admin"].drop()
             logger.info("Dropped admin collection")
         except Exception as e:
             logger.error(f"Error dropping admin collection: {e}")
             raise
 
-    def set_team_participant_status(self, team_id, status):
+    async def set_team_participant_status(self, team_id, status):
         try:
-            self.teams.update_one({"_id": team_id}, {"$set": {"is_participant": status}})
+            await self.teams.update_one({"_id": team_id}, {"$set": {"is_participant": status}})
             logger.info(f"Updated is_participant to {status} for team {team_id}")
         except Exception as e:
             logger.error(f"Error updating is_participant for team {team_id}: {e}")
             raise
 
-    def set_team_test_task_status(self, team_id, status):
+    async def set_team_test_task_status(self, team_id, status):
         try:
-            self.teams.update_one({"_id": team_id}, {"$set": {"test_task_status": status}})
+            await self.teams.update_one({"_id": team_id}, {"$set": {"test_task_status": status}})
             if status:
-                self.set_team_participant_status(team_id, True) 
+                await self.set_team_participant_status(team_id, True) 
             logger.info(f"Updated test_task_status to {status} for team {team_id}")
         except Exception as e:
             logger.error(f"Error updating test_task_status for team {team_id}: {e}")
             raise
 
-    def get_team_status(self, team_id):
+    async def set_team_status_by_name(self, team_name, test_task_status, is_participant):
         try:
-            team = self.teams.find_one({"_id": team_id})
+            result = await self.teams.update_one(
+                {"team_name": team_name, "category": "CTF2025"},
+                {"$set": {"test_task_status": test_task_status, "is_participant": is_participant}}
+            )
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Error updating team {team_name} status: {e}")
+            raise
+
+    async def get_team_status(self, team_id):
+        try:
+            team = await self.teams.find_one({"_id": team_id}, {"_id": 0, "is_participant": 1, "test_task_status": 1})
             if team:
-                return {"is_participant": team.get("is_participant", False), "test_task_status": team.get("test_task_status", False)}
-            return {"is_participant": False, "test_task_status": False}
+                return TeamStatus(team.get("is_participant", False), team.get("test_task_status", False))
+            return TeamStatus()
         except Exception as e:
             logger.error(f"Error getting team status for {team_id}: {e}")
-            return {"is_participant": False, "test_task_status": False}
+            return TeamStatus()
+
+    def _cache_event_state(self, state):
+        self._event_state = state
+        self._event_state_loaded_at = time.monotonic()
 
-    def set_event_state(self, state):
+    async def watch_event_state(self):
+        pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}, "fullDocument.event_id": "CTF2025"}}]
+        while True:
+            try:
+                async with self.event_state.watch(pipeline, full_document="updateLookup") as stream:
+                    self._event_state_watched = True
+                    self._event_state = None
+                    logger.info("Watching event state changes")
+                    async for change in stream:
+                        self._cache_event_state(change["fullDocument"]["current_state"])
+                        logger.info(f"Event state changed to {self._event_state}")
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                logger.warning(f"Event state change stream is not supported, polling every {self.event_state_ttl}s instead: {e}")
+                return
+            except Exception as e:
+                logger.error(f"Event state change stream failed: {e}")
+            finally:
+                self._event_state_watched = False
+            await asyncio.sleep(self.event_state_ttl)
+
+    async def set_event_state(self, state):
         try:
-            valid_states = ["registration", "test_task", "main_task", "finished"]
-            if state not in valid_states:
-                raise ValueError(f"Invalid state: {state}. Must be one of {valid_states}")
-            self.event_state.update_one({"event_id": "CTF2025"}, {"$set": {"current_state": state}}, upsert=True)
+            if state not in EVENT_STATES:
+                raise ValueError(f"Invalid state: {state}. Must be one of {EVENT_STATES}")
+            await self.event_state.update_one({"event_id": "CTF2025"}, {"$set": {"current_state": state}}, upsert=True)
+            self._cache_event_state(state)
             logger.info(f"Set event state to {state}")
         except Exception as e:
             logger.error(f"Error setting event state to {state}: {e}")
             raise
 
-    def get_event_state(self):
+    async def get_event_state(self):
+        if self._event_state is not None and (self._event_state_watched or time.monotonic() - self._event_state_loaded_at < self.event_state_ttl):
+            return self._event_state
         try:
-            event = self.event_state.find_one({"event_id": "CTF2025"})
-            return event["current_state"] if event else "registration"
+            event = await self.event_state.find_one({"event_id": "CTF2025"})
+            self._cache_event_state(event["current_state"] if event else "registration")
+            return self._event_state
         except Exception as e:
             logger.error(f"Error getting event state: {e}")
-            return "registration"
\ No newline at end of file
+            return "registration"
+
+    async def get_member_chat_ids(self, user_ids):
+        try:
+            members = self.participants.find(
+                {"user_id": {"$in": list(user_ids)}, "chat_id": {"$exists": True}, "blocked": {"$ne": True}},
+                {"_id": 0, "user_id": 1, "chat_id": 1}
+            )
+            return {member["user_id"]: member["chat_id"] async for member in members}
+        except Exception as e:
+            logger.error(f"Error getting chat ids for users {user_ids}: {e}")
+            raise
+
+    async def set_chat_blocked(self, chat_id, blocked):
+        try:
+            if blocked:
+                result = await self.participants.update_many({"chat_id": chat_id, "blocked": {"$ne": True}}, {"$set": {"blocked": True, "blocked_at": datetime.now().isoformat()}})
+                if result.modified_count:
+                    logger.info(f"Suppressed blocked chat {chat_id}")
+            else:
+                result = await self.participants.update_many({"chat_id": chat_id, "blocked": True}, {"$unset": {"blocked": "", "blocked_at": ""}})
+                if result.modified_count:
+                    logger.info(f"Removed suppression for chat {chat_id}")
+        except Exception as e:
+            logger.error(f"Error updating blocked flag for chat {chat_id}: {e}")
+
+    async def get_asset_file_id(self, content_hash, kind):
+        try:
+            asset = await self.asset_cache.find_one({"content_hash": content_hash, "kind": kind}, {"_id": 0, "file_id": 1})
+            return asset["file_id"] if asset else None
+        except Exception as e:
+            logger.error(f"Error getting cached file_id for asset {content_hash}: {e}")
+            return None
+
+    async def save_asset_file_id(self, content_hash, kind, name, file_id):
+        try:
+            await self.asset_cache.update_one(
+                {"content_hash": content_hash, "kind": kind},
+                {"$set": {"name": name, "file_id": file_id, "uploaded_at": datetime.now().isoformat()}},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error caching file_id for asset {name}: {e}")
+
+    async def delete_asset_file_id(self, content_hash, kind):
+        try:
+            await self.asset_cache.delete_one({"content_hash": content_hash, "kind": kind})
+        except Exception as e:
+            logger.error(f"Error deleting cached file_id for asset {content_hash}: {e}")
+
+    async def create_broadcast_job(self, text, admin_chat_id, owner=None, lease_until=None):
+        try:
+            result = await self.broadcast_jobs.insert_one({
+                "text": text,
+                "admin_chat_id": admin_chat_id,
+                "status": "preparing",
+                "total": 0,
+                "sent": 0,
+                "failed": 0,
+                "attempts": 1,
+                "owner": owner,
+                "lease_until": lease_until,
+                "created_at": datetime.now().isoformat()
+            })
+            logger.info(f"Created broadcast job {result.inserted_id}")
+            return result.inserted_id
+        except Exception as e:
+            logger.error(f"Error creating broadcast job: {e}")
+            raise
+
+    async def claim_broadcast_job(self, job_id, owner, lease_until):
+        try:
+            return await self.broadcast_jobs.find_one_and_update(
+                {
+                    "_id": job_id,
+                    "status": {"$in": UNFINISHED_BROADCAST_STATES},
+                    "$or": [{"lease_until": None}, {"lease_until": {"$lte": datetime.now(timezone.utc)}}]
+                },
+                {"$set": {"owner": owner, "lease_until": lease_until}, "$inc": {"attempts": 1}},
+                return_document=ReturnDocument.AFTER
+            )
+        except Exception as e:
+            logger.error(f"Error claiming broadcast job {job_id}: {e}")
+            raise
+
+    async def renew_broadcast_lease(self, job_id, owner, lease_until):
+        try:
+            result = await self.broadcast_jobs.update_one({"_id": job_id, "owner": owner}, {"$set": {"lease_until": lease_until}})
+            return result.matched_count > 0
+        except Exception as e:
+            logger.error(f"Error renewing lease of broadcast job {job_id}: {e}")
+            raise
+
+    async def release_broadcast_job(self, job_id, owner):
+        try:
+            await self.broadcast_jobs.update_one({"_id": job_id, "owner": owner}, {"$set": {"lease_until": None}})
+        except Exception as e:
+            logger.error(f"Error releasing broadcast job {job_id}: {e}")
+            raise
+
+    async def reset_broadcast_recipients(self, job_id):
+        try:
+            await self.broadcast_recipients.delete_many({"job_id": job_id})
+        except Exception as e:
+            logger.error(f"Error resetting recipients of broadcast job {job_id}: {e}")
+            raise
+
+    async def add_broadcast_recipients(self, job_id, recipients):
+        if not recipients:
+            return
+        try:
+            await self.broadcast_recipients.insert_many([
+                {"job_id": job_id, "user_id": recipient.get("user_id"), "chat_id": recipient["chat_id"], "status": "pending"}
+                for recipient in recipients
+            ], ordered=False)
+        except Exception as e:
+            logger.error(f"Error adding recipients to broadcast job {job_id}: {e}")
+            raise
+
+    async def start_broadcast_job(self, job_id, total, failed):
+        try:
+            await self.broadcast_jobs.update_one({"_id": job_id}, {"$set": {"status": "sending", "total": total, "failed": failed}})
+        except Exception as e:
+            logger.error(f"Error starting broadcast job {job_id}: {e}")
+            raise
+
+    async def iter_pending_broadcast_recipients(self, job_id, batch_size=None):
+        async for recipient in self.broadcast_recipients.find(
+            {"job_id": job_id, "status": "pending"},
+            {"_id": 0, "user_id": 1, "chat_id": 1},
+            batch_size=batch_size or self.batch_size
+        ):
+            yield recipient
+
+    async def update_broadcast_progress(self, job_id, delivered, failed):
+        try:
+            operations = []
+            if delivered:
+                operations.append(UpdateMany({"job_id": job_id, "chat_id": {"$in": delivered}}, {"$set": {"status": "delivered"}}))
+            if failed:
+                operations.append(UpdateMany({"job_id": job_id, "chat_id": {"$in": failed}}, {"$set": {"status": "failed"}}))
+            if operations:
+                await self.broadcast_recipients.bulk_write(operations, ordered=False)
+                await self.broadcast_jobs.update_one({"_id": job_id}, {"$inc": {"sent": len(delivered), "failed": len(failed)}})
+        except Exception as e:
+            logger.error(f"Error saving progress of broadcast job {job_id}: {e}")
+            raise
+
+    async def finish_broadcast_job(self, job_id):
+        try:
+            await self.broadcast_jobs.update_one({"_id": job_id}, {"$set": {"status": "finished", "finished_at": datetime.now().isoformat()}})
+            logger.info(f"Finished broadcast job {job_id}")
+        except Exception as e:
+            logger.error(f"Error finishing broadcast job {job_id}: {e}")
+            raise
+
+    async def fail_broadcast_job(self, job_id, error):
+        try:
+            await self.broadcast_jobs.update_one(
+                {"_id": job_id},
+                {"$set": {"status": "failed", "error": error, "lease_until": None, "failed_at": datetime.now().isoformat()}}
+            )
+            logger.info(f"Gave up on broadcast job {job_id}")
+        except Exception as e:
+            logger.error(f"Error marking broadcast job {job_id} as failed: {e}")
+            raise
+
+    async def get_unfinished_broadcast_jobs(self):
+        try:
+            return await self.broadcast_jobs.find({"status": {"$in": UNFINISHED_BROADCAST_STATES}}).to_list(length=None)
+        except Exception as e:
+            logger.error(f"Error getting unfinished broadcast jobs: {e}")
+            return []
+
+    async def get_fsm_record(self, key):
+        try:
+            return await self.fsm_states.find_one(
+                {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}},
+                {"_id": 0, "state": 1, "data": 1, "version": 1, "expires_at": 1}
+            )
+        except Exception as e:
+            logger.error(f"Error getting FSM record {key}: {e}")
+            raise
+
+    async def get_fsm_version(self, key):
+        try:
+            doc = await self.fsm_states.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}, {"_id": 0, "version": 1})
+            return doc.get("version") if doc else None
+        except Exception as e:
+            logger.error(f"Error getting FSM record version {key}: {e}")
+            raise
+
+    async def save_fsm_records(self, records):
+        operations = []
+        for record in records:
+            if record["state"] is None and not record["data"]:
+                operations.append(DeleteOne({"_id": record["key"]}))
+            else:
+                operations.append(UpdateOne(
+                    {"_id": record["key"]},
+                    {"$set": {"state": record["state"], "data": record["data"], "version": record["version"], "expires_at": record["expires_at"]}},
+                    upsert=True
+                ))
+        try:
+            if operations:
+                await self.fsm_states.bulk_write(operations, ordered=False)
+            return True
+        except Exception as e:
+            logger.error(f"Error saving {len(operations)} FSM records: {e}")
+            return False
\ No newline at end of file
@@ -0,0 +1,9 @@
+from database.db import MongoDatabase
+from database.memory import MemoryDatabase
+
+def create_database(backend, mongo_uri=None, event_state_ttl=5.0, batch_size=500):
+    if backend == "mongo":
+        return MongoDatabase(mongo_uri, event_state_ttl=event_state_ttl, batch_size=batch_size)
+    if backend == "memory":
+        return MemoryDatabase()
+    raise ValueError(f"Unknown storage backend: {backend}. Must be one of ['mongo', 'memory']")
@@ -0,0 +1,227 @@
+import asyncio
+import heapq
+import logging
+import secrets
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from aiogram.exceptions import DataNotDictLikeError
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder
+
+logger = logging.getLogger(__name__)
+
+@dataclass(slots=True)
+class FSMRecord:
+    state: str = None
+    data: dict = field(default_factory=dict)
+    expires_at: float = 0.0
+    persisted_until: float = 0.0
+    version: str = None
+    dirty: bool = False
+    writing: asyncio.Event = None
+
+def state_group(state):
+    return state.rsplit(":", 1)[0] if state else None
+
+class CachedFSMStorage(BaseStorage):
+    def __init__(self, db, ttl=604800.0, sweep_interval=60.0, key_builder=None, group_ttls=None, revalidate=False):
+        self.db = db
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.key_builder = key_builder or DefaultKeyBuilder(with_bot_id=True, with_destiny=True)
+        self.group_ttls = {
+            group.__full_group_name__ if isinstance(group, type) and issubclass(group, StatesGroup) else group: group_ttl
+            for group, group_ttl in (group_ttls or {}).items()
+        }
+        self.revalidate = revalidate
+        self.records = {}
+        self.sessions = Counter()
+        self.reads = 0
+        self.writes = 0
+        self.evicted = 0
+        self.stale = 0
+        self._expiry = []
+        self._last_sweep = (time.monotonic(), 0)
+
+    def _ttl(self, state):
+        return self.group_ttls.get(state_group(state), self.ttl)
+
+    def _touch(self, record_key, record, now=None):
+        now = now or time.monotonic()
+        record.expires_at = now + self._ttl(record.state)
+        heapq.heappush(self._expiry, (record.expires_at, record_key))
+        if len(self._expiry) > 2 * len(self.records) + 1024:
+            self._expiry = [(r.expires_at, k) for k, r in self.records.items()]
+            heapq.heapify(self._expiry)
+
+    def _set_state(self, record, state):
+        if record.state:
+            self.sessions[state_group(record.state)] -= 1
+        if state:
+            self.sessions[state_group(state)] += 1
+        record.state = state
+
+    def _drop(self, record_key):
+        record = self.records.pop(record_key)
+        if record.state:
+            self.sessions[state_group(record.state)] -= 1
+
+    def _evict(self, record_key):
+        self._drop(record_key)
+        self.evicted += 1
+
+    async def _record(self, key, revalidate=False):
+        record_key = self.key_builder.build(key)
+        now = time.monotonic()
+        record = self.records.get(record_key)
+        if record is not None and record.expires_at <= now and not record.dirty and not record.writing:
+            self._evict(record_key)
+            record = None
+        if record is not None and revalidate and not record.dirty and not record.writing:
+            version = await self.db.get_fsm_version(record_key)
+            if self.records.get(record_key) is record and not record.dirty and not record.writing and version != record.version:
+                self._drop(record_key)
+                self.stale += 1
+            record = self.records.get(record_key)
+        if record is None:
+            self.reads += 1
+            doc = await self.db.get_fsm_record(record_key)
+            record = self.records.get(record_key)
+            if record is None:
+                record = self.records[record_key] = FSMRecord()
+                if doc:
+                    self._set_state(record, doc.get("state"))
+                    record.data = doc.get("data") or {}
+                    record.version = doc.get("version")
+                    expires_at = doc["expires_at"]
+                    if expires_at.tzinfo is None:
+                        expires_at = expires_at.replace(tzinfo=timezone.utc)
+                    record.persisted_until = now + (expires_at - datetime.now(timezone.utc)).total_seconds()
+        self._touch(record_key, record, now)
+        return record
+
+    async def set_state(self, key, state=None):
+        record = await self._record(key)
+        self._set_state(record, state.state if isinstance(state, State) else state)
+        self._touch(self.key_builder.build(key), record)
+        record.dirty = True
+
+    def peek_state(self, key):
+        record = self.records.get(self.key_builder.build(key))
+        return record.state if record else None
+
+    async def get_state(self, key):
+        return (await self._record(key, revalidate=self.revalidate)).state
+
+    async def set_data(self, key, data):
+        if not isinstance(data, dict):
+            raise DataNotDictLikeError(f"Data must be a dict or dict-like object, got {type(data).__name__}")
+        record = await self._record(key)
+        record.data = data.copy()
+        record.dirty = True
+
+    async def get_data(self, key):
+        return (await self._record(key)).data.copy()
+
+    def _needs_write(self, record, now):
+        if record.dirty:
+            return True
+        return record.persisted_until and record.persisted_until - now < self._ttl(record.state) / 2
+
+    async def _write(self, items):
+        while True:
+            in_flight = {record.writing for _, record in items if record.writing}
+            if not in_flight:
+                break
+            await asyncio.gather(*(writing.wait() for writing in in_flight))
+        now = time.monotonic()
+        items = [(record_key, record) for record_key, record in items if self._needs_write(record, now)]
+        if not items:
+            return True
+        written_at = datetime.now(timezone.utc)
+        writing = asyncio.Event()
+        snapshots = [(record_key, record, record.state, record.data, secrets.token_hex(8)) for record_key, record in items]
+        for _, record, _, _, _ in snapshots:
+            record.dirty = False
+            record.writing = writing
+        saved = False
+        try:
+            saved = await self.db.save_fsm_records([
+                {"key": record_key, "state": state, "data": data, "version": version, "expires_at": written_at + timedelta(seconds=self._ttl(state))}
+                for record_key, _, state, data, version in snapshots
+            ])
+        finally:
+            for _, record, state, data, version in snapshots:
+                record.writing = None
+                if not saved:
+                    record.dirty = True
+                elif state is None and not data:
+                    record.persisted_until = 0.0
+                    record.version = None
+                else:
+                    record.persisted_until = now + self._ttl(state)
+                    record.version = version
+            writing.set()
+        if saved:
+            self.writes += 1
+        return saved
+
+    async def flush(self, key=None):
+        if key is None:
+            return await self._write(list(self.records.items()))
+        record_key = self.key_builder.build(key)
+        record = self.records.get(record_key)
+        if record is None:
+            return True
+        return await self._write([(record_key, record)])
+
+    def sweep(self):
+        now = time.monotonic()
+        evicted = 0
+        while self._expiry and self._expiry[0][0] <= now:
+            expires_at, record_key = heapq.heappop(self._expiry)
+            record = self.records.get(record_key)
+            if record is None or record.expires_at != expires_at:
+                continue
+            if record.dirty or record.writing:
+                record.expires_at = now + self.sweep_interval
+                heapq.heappush(self._expiry, (record.expires_at, record_key))
+                continue
+            self._evict(record_key)
+            evicted += 1
+        return evicted
+
+    @property
+    def metrics(self):
+        now = time.monotonic()
+        swept_at, evicted = self._last_sweep
+        elapsed = now - swept_at
+        return {
+            "cached": len(self.records),
+            "sessions": sum(self.sessions.values()),
+            "sessions_by_group": {group: count for group, count in self.sessions.items() if count},
+            "evicted": self.evicted,
+            "stale": self.stale,
+            "evictions_per_minute": (self.evicted - evicted) * 60 / elapsed if elapsed > 0 else 0.0,
+        }
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.flush()
+                self.sweep()
+                metrics = self.metrics
+                self._last_sweep = (time.monotonic(), self.evicted)
+                logger.info(
+                    f"FSM sessions: {metrics['sessions']} live {metrics['sessions_by_group']}, {metrics['cached']} cached, "
+                    f"{metrics['evicted']} evicted ({metrics['evictions_per_minute']:.1f}/min), {metrics['stale']} reloaded as stale"
+                )
+            except Exception as e:
+                logger.error(f"Error sweeping FSM records: {e}")
+
+    async def close(self):
+        if not await self.flush():
+            logger.error("Failed to flush FSM records on shutdown")
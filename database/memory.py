@@ -0,0 +1,359 @@
+from bson import ObjectId
+import asyncio
+from datetime import datetime, timezone
+import logging
+from database.base import Database, EVENT_STATES, MAX_TEAM_MEMBERS, UNFINISHED_BROADCAST_STATES
+from database.models import ParticipantSummary, TeamStatus
+
+logger = logging.getLogger(__name__)
+
+class MemoryDatabase(Database):
+    def __init__(self):
+        super().__init__()
+        self.participants = {}
+        self.teams = {}
+        self.team_ids_by_name = {}
+        self.cv = {}
+        self.event_state = "registration"
+        self.asset_cache = {}
+        self.broadcast_jobs = {}
+        self.broadcast_recipients = {}
+        self.fsm_states = {}
+        logger.info("Using in-memory storage backend")
+
+    def _copy_team(self, team):
+        return dict(team, members=list(team["members"]))
+
+    async def is_user_registered(self, user_id):
+        return user_id in self.participants
+
+    async def is_user_in_team(self, user_id):
+        participant = self.participants.get(user_id)
+        return participant is not None and participant.get("team_id") is not None
+
+    def _link_participant_to_team(self, user_id, team_id):
+        participant = self.participants.get(user_id)
+        if participant is None or participant.get("team_id") is not None:
+            return False
+        participant["team_id"] = team_id
+        return True
+
+    async def create_team(self, team_name, user_id, password=None):
+        if team_name in self.team_ids_by_name:
+            logger.info(f"Team {team_name} already exists, user {user_id} cannot create it")
+            return None
+        team = {
+            "_id": ObjectId(),
+            "team_name": team_name,
+            "category": "CTF2025",
+            "members": [user_id],
+            "is_participant": False,
+            "test_task_status": False
+        }
+        if password:
+            team["password"] = password
+        if not self._link_participant_to_team(user_id, team["_id"]):
+            logger.warning(f"User {user_id} is already in a team, rolled back creation of {team_name}")
+            return None
+        self.teams[team["_id"]] = team
+        self.team_ids_by_name[team_name] = team["_id"]
+        logger.info(f"Created new team {team_name} for user {user_id}")
+        return self._copy_team(team)
+
+    async def join_team(self, team_name, user_id, password=None):
+        team = self.teams.get(self.team_ids_by_name.get(team_name))
+        if team is None or team.get("password") not in (password, None):
+            return None
+        if len(team["members"]) >= MAX_TEAM_MEMBERS or user_id in team["members"]:
+            return None
+        if not self._link_participant_to_team(user_id, team["_id"]):
+            logger.warning(f"User {user_id} is already in a team, rolled back joining {team_name}")
+            return None
+        team["members"].append(user_id)
+        logger.info(f"User {user_id} added to existing team {team_name}")
+        return self._copy_team(team)
+
+    async def add_participant(self, user_id, name, age, university, specialty, course, source, phone, data_consent, team_id, chat_id):
+        if user_id in self.participants:
+            logger.error(f"Failed to add participant {user_id}: already registered")
+            raise ValueError(f"Participant {user_id} already exists")
+        self.participants[user_id] = {
+            "_id": ObjectId(),
+            "user_id": user_id,
+            "name": name,
+            "age": age,
+            "university": university,
+            "specialty": specialty,
+            "course": course,
+            "source": source,
+            "data_consent": data_consent,
+            "phone": phone,
+            "team_id": team_id,
+            "chat_id": chat_id,
+            "registration_date": datetime.now().isoformat()
+        }
+        logger.info(f"Added participant {user_id} to DB")
+
+    async def leave_team(self, user_id):
+        participant = self.participants.get(user_id)
+        if participant and participant.get("team_id"):
+            team_id = participant["team_id"]
+            team = self.teams.get(team_id)
+            if team and user_id in team["members"]:
+                team["members"].remove(user_id)
+            participant["team_id"] = None
+            logger.info(f"User {user_id} left team {team_id}")
+            return True
+        return False
+
+    async def team_exists(self, team_name):
+        return team_name in self.team_ids_by_name
+
+    async def set_data_consent(self, user_id, data_consent):
+        if user_id in self.participants:
+            self.participants[user_id]["data_consent"] = data_consent
+            logger.info(f"Updated data_consent for user {user_id}")
+
+    async def get_user_data(self, user_id):
+        participant = self.participants.get(user_id)
+        return participant["name"] if participant else "друже"
+
+    def _build_participant_summary(self, participant):
+        return ParticipantSummary(participant["user_id"], participant.get("name", "друже"), participant.get("team_id"), participant.get("chat_id"))
+
+    def _build_team_view(self, participant):
+        team = self.teams.get(participant.get("team_id"))
+        if not team:
+            return None
+        member_details = []
+        for member_id in team["members"]:
+            member = self.participants.get(member_id)
+            if member:
+                member_details.append({key: member[key] for key in ("user_id", "name", "chat_id") if key in member})
+        return {
+            "_id": team["_id"],
+            "team_name": team["team_name"],
+            "members": list(team["members"]),
+            "member_details": member_details,
+            "status": TeamStatus(team.get("is_participant", False), team.get("test_task_status", False))
+        }
+
+    async def get_team_view(self, user_id):
+        participant = self.participants.get(user_id)
+        return self._build_team_view(participant) if participant else None
+
+    async def get_user_context(self, user_id):
+        participant = self.participants.get(user_id)
+        if participant is None:
+            return None, None
+        return self._build_participant_summary(participant), self._build_team_view(participant)
+
+    async def get_teams(self):
+        return [self._copy_team(team) for team in self.teams.values()]
+
+    async def get_participants(self):
+        return [dict(participant) for participant in self.participants.values()]
+
+    def _project(self, doc, projection):
+        if not projection:
+            return dict(doc)
+        fields = {key for key, include in projection.items() if include}
+        if "_id" not in projection:
+            fields.add("_id")
+        return {key: value for key, value in doc.items() if key in fields}
+
+    async def _iter_documents(self, documents, projection, batch_size):
+        for index, doc in enumerate(list(documents), start=1):
+            yield self._project(doc, projection)
+            if index % (batch_size or 500) == 0:
+                await asyncio.sleep(0)
+
+    async def iter_teams(self, projection=None, batch_size=None):
+        async for team in self._iter_documents(self.teams.values(), projection, batch_size):
+            yield team
+
+    async def iter_participants(self, projection=None, batch_size=None, reachable_only=False):
+        participants = [participant for participant in self.participants.values() if not (reachable_only and participant.get("blocked"))]
+        async for participant in self._iter_documents(participants, projection, batch_size):
+            yield participant
+
+    async def delete_participant(self, user_id):
+        participant = self.participants.pop(user_id, None)
+        if participant is None:
+            return False
+        team = self.teams.get(participant.get("team_id"))
+        if team and user_id in team["members"]:
+            team["members"].remove(user_id)
+        logger.info(f"Deleted participant {user_id} from DB")
+        return True
+
+    async def save_cv(self, user_id, file_id, file_name):
+        self.cv[user_id] = {"user_id": user_id, "file_id": file_id, "file_name": file_name, "upload_date": datetime.now().isoformat()}
+        logger.info(f"Saved CV for user {user_id}")
+
+    async def get_cv(self, user_id):
+        cv = self.cv.get(user_id)
+        return dict(cv) if cv else None
+
+    async def delete_admin_collection(self):
+        logger.info("Dropped admin collection")
+
+    async def set_team_participant_status(self, team_id, status):
+        if team_id in self.teams:
+            self.teams[team_id]["is_participant"] = status
+        logger.info(f"Updated is_participant to {status} for team {team_id}")
+
+    async def set_team_test_task_status(self, team_id, status):
+        if team_id in self.teams:
+            self.teams[team_id]["test_task_status"] = status
+            if status:
+                await self.set_team_participant_status(team_id, True)
+        logger.info(f"Updated test_task_status to {status} for team {team_id}")
+
+    async def set_team_status_by_name(self, team_name, test_task_status, is_participant):
+        team = self.teams.get(self.team_ids_by_name.get(team_name))
+        if team is None or team.get("category") != "CTF2025":
+            return False
+        team["test_task_status"] = test_task_status
+        team["is_participant"] = is_participant
+        return True
+
+    async def get_team_status(self, team_id):
+        team = self.teams.get(team_id)
+        if team:
+            return TeamStatus(team.get("is_participant", False), team.get("test_task_status", False))
+        return TeamStatus()
+
+    async def set_event_state(self, state):
+        if state not in EVENT_STATES:
+            raise ValueError(f"Invalid state: {state}. Must be one of {EVENT_STATES}")
+        self.event_state = state
+        logger.info(f"Set event state to {state}")
+
+    async def get_event_state(self):
+        return self.event_state
+
+    async def get_member_chat_ids(self, user_ids):
+        members = (self.participants.get(user_id) for user_id in user_ids)
+        return {member["user_id"]: member["chat_id"] for member in members if member and "chat_id" in member and not member.get("blocked")}
+
+    async def set_chat_blocked(self, chat_id, blocked):
+        changed = False
+        for participant in self.participants.values():
+            if participant.get("chat_id") == chat_id and bool(participant.get("blocked")) != blocked:
+                changed = True
+                if blocked:
+                    participant.update(blocked=True, blocked_at=datetime.now().isoformat())
+                else:
+                    participant.pop("blocked", None)
+                    participant.pop("blocked_at", None)
+        if changed:
+            logger.info(f"{'Suppressed blocked chat' if blocked else 'Removed suppression for chat'} {chat_id}")
+
+    async def get_asset_file_id(self, content_hash, kind):
+        asset = self.asset_cache.get((content_hash, kind))
+        return asset["file_id"] if asset else None
+
+    async def save_asset_file_id(self, content_hash, kind, name, file_id):
+        self.asset_cache[(content_hash, kind)] = {"name": name, "file_id": file_id, "uploaded_at": datetime.now().isoformat()}
+
+    async def delete_asset_file_id(self, content_hash, kind):
+        self.asset_cache.pop((content_hash, kind), None)
+
+    async def create_broadcast_job(self, text, admin_chat_id, owner=None, lease_until=None):
+        job_id = ObjectId()
+        self.broadcast_jobs[job_id] = {
+            "_id": job_id,
+            "text": text,
+            "admin_chat_id": admin_chat_id,
+            "status": "preparing",
+            "total": 0,
+            "sent": 0,
+            "failed": 0,
+            "attempts": 1,
+            "owner": owner,
+            "lease_until": lease_until,
+            "created_at": datetime.now().isoformat()
+        }
+        self.broadcast_recipients[job_id] = {}
+        logger.info(f"Created broadcast job {job_id}")
+        return job_id
+
+    async def claim_broadcast_job(self, job_id, owner, lease_until):
+        job = self.broadcast_jobs.get(job_id)
+        if not job or job["status"] not in UNFINISHED_BROADCAST_STATES:
+            return None
+        if job.get("lease_until") and job["lease_until"] > datetime.now(timezone.utc):
+            return None
+        job.update(owner=owner, lease_until=lease_until, attempts=job.get("attempts", 0) + 1)
+        return dict(job)
+
+    async def renew_broadcast_lease(self, job_id, owner, lease_until):
+        job = self.broadcast_jobs.get(job_id)
+        if not job or job.get("owner") != owner:
+            return False
+        job["lease_until"] = lease_until
+        return True
+
+    async def release_broadcast_job(self, job_id, owner):
+        job = self.broadcast_jobs.get(job_id)
+        if job and job.get("owner") == owner:
+            job["lease_until"] = None
+
+    async def reset_broadcast_recipients(self, job_id):
+        self.broadcast_recipients[job_id] = {}
+
+    async def add_broadcast_recipients(self, job_id, recipients):
+        job_recipients = self.broadcast_recipients.setdefault(job_id, {})
+        for recipient in recipients:
+            job_recipients[recipient["chat_id"]] = {"user_id": recipient.get("user_id"), "chat_id": recipient["chat_id"], "status": "pending"}
+
+    async def start_broadcast_job(self, job_id, total, failed):
+        self.broadcast_jobs[job_id].update(status="sending", total=total, failed=failed)
+
+    async def iter_pending_broadcast_recipients(self, job_id, batch_size=None):
+        pending = [recipient for recipient in self.broadcast_recipients.get(job_id, {}).values() if recipient["status"] == "pending"]
+        async for recipient in self._iter_documents(pending, {"_id": 0, "user_id": 1, "chat_id": 1}, batch_size):
+            yield recipient
+
+    async def update_broadcast_progress(self, job_id, delivered, failed):
+        job_recipients = self.broadcast_recipients.get(job_id, {})
+        for status, chat_ids in (("delivered", delivered), ("failed", failed)):
+            for chat_id in chat_ids:
+                if chat_id in job_recipients:
+                    job_recipients[chat_id]["status"] = status
+        job = self.broadcast_jobs[job_id]
+        job["sent"] += len(delivered)
+        job["failed"] += len(failed)
+
+    async def finish_broadcast_job(self, job_id):
+        self.broadcast_jobs[job_id].update(status="finished", finished_at=datetime.now().isoformat())
+        logger.info(f"Finished broadcast job {job_id}")
+
+    async def fail_broadcast_job(self, job_id, error):
+        self.broadcast_jobs[job_id].update(status="failed", error=error, lease_until=None, failed_at=datetime.now().isoformat())
+        logger.info(f"Gave up on broadcast job {job_id}")
+
+    async def get_unfinished_broadcast_jobs(self):
+        return [dict(job) for job in self.broadcast_jobs.values() if job["status"] in UNFINISHED_BROADCAST_STATES]
+
+    async def get_fsm_record(self, key):
+        record = self.fsm_states.get(key)
+        if record is None:
+            return None
+        if record["expires_at"] <= datetime.now(timezone.utc):
+            del self.fsm_states[key]
+            return None
+        return {"state": record["state"], "data": dict(record["data"]), "version": record["version"], "expires_at": record["expires_at"]}
+
+    async def get_fsm_version(self, key):
+        record = await self.get_fsm_record(key)
+        return record["version"] if record else None
+
+    async def save_fsm_records(self, records):
+        for record in records:
+            if record["state"] is None and not record["data"]:
+                self.fsm_states.pop(record["key"], None)
+            else:
+                self.fsm_states[record["key"]] = {"state": record["state"], "data": dict(record["data"]), "version": record["version"], "expires_at": record["expires_at"]}
+        return True
\ No newline at end of file
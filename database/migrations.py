@@ -0,0 +1,48 @@
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+async def create_base_indexes(db):
+    await db.participants.create_index("user_id", unique=True)
+    await db.teams.create_index("team_name", unique=True)
+    await db.cv.create_index("user_id", unique=True)
+    await db.event_state.create_index("event_id", unique=True)
+
+async def create_broadcast_indexes(db):
+    await db.broadcast_jobs.create_index("status")
+    await db.broadcast_recipients.create_index([("job_id", 1), ("status", 1)])
+    await db.broadcast_recipients.create_index([("job_id", 1), ("chat_id", 1)], unique=True)
+
+async def create_suppression_indexes(db):
+    await db.participants.create_index("chat_id")
+    await db.participants.create_index("blocked", partialFilterExpression={"blocked": True})
+
+async def create_asset_cache_indexes(db):
+    await db.asset_cache.create_index([("content_hash", 1), ("kind", 1)], unique=True)
+
+async def create_fsm_state_indexes(db):
+    await db.fsm_states.create_index("expires_at", expireAfterSeconds=0)
+
+MIGRATIONS = [
+    (1, "Create unique lookup indexes", create_base_indexes),
+    (2, "Create broadcast job indexes", create_broadcast_indexes),
+    (3, "Create blocked chat suppression indexes", create_suppression_indexes),
+    (4, "Create asset file_id cache index", create_asset_cache_indexes),
+    (5, "Create FSM state TTL index", create_fsm_state_indexes),
+]
+
+async def run_migrations(db):
+    await db.migrations.create_index("version", unique=True)
+    applied = {doc["version"] async for doc in db.migrations.find({}, {"version": 1})}
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"Applying migration {version}: {description}")
+        await migrate(db)
+        await db.migrations.insert_one({
+            "version": version,
+            "description": description,
+            "applied_at": datetime.now().isoformat()
+        })
+        logger.info(f"Applied migration {version}")
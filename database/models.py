@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+
+@dataclass(slots=True, frozen=True)
+class ParticipantSummary:
+    user_id: int
+    name: str = "друже"
+    team_id: object = None
+    chat_id: int = None
+
+@dataclass(slots=True, frozen=True)
+class TeamStatus:
+    is_participant: bool = False
+    test_task_status: bool = False
@@ -0,0 +1,26 @@
+from contextvars import ContextVar
+
+QUERY_METHODS = {
+    "find", "find_one", "find_one_and_update", "find_one_and_delete", "aggregate", "count_documents",
+    "insert_one", "insert_many", "update_one", "update_many", "delete_one", "delete_many", "bulk_write"
+}
+
+query_counter = ContextVar("query_counter", default=None)
+
+def count_query():
+    counter = query_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+class CountedCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        attr = getattr(self._collection, name)
+        if name in QUERY_METHODS:
+            def counted(*args, **kwargs):
+                count_query()
+                return attr(*args, **kwargs)
+            return counted
+        return attr
@@ -1,8 +1,10 @@
 import logging
-from aiogram import Dispatcher, types
+from aiogram import types
 from aiogram.fsm.context import FSMContext
 from states.team import TeamMenu
 from database import Database
+from middlewares import UserContext
+from routing import ButtonRouter
 
 logger = logging.getLogger(__name__)
 
@@ -26,26 +28,10 @@ def get_back_keyboard():
         one_time_keyboard=True
     )
 
-async def get_team_info(db: Database, user_id: int):
-    try:
-        participant = db.participants.find_one({"user_id": user_id})
-        if participant and participant.get("team_id"):
-            team = db.teams.find_one({"_id": participant["team_id"]})
-            if team:
-                team_name = team["team_name"]
-                members = team["members"]
-                member_names = [member["name"] for member_id in members if (member := db.participants.find_one({"user_id": member_id}))]
-                member_list = ", ".join(member_names) if member_names else "Тільки ти"
-                return f"Твоя команда: {team_name}\nУчасники: {len(members)}/4\nСклад: {member_list}"
-        return None
-    except Exception as e:
-        logger.error(f"Error fetching team info for user {user_id}: {e}")
-        return None
+def register_cv_handlers(routes: ButtonRouter, db, bot):
+    from handlers.team_handlers import get_main_menu_keyboard, get_team_menu_keyboard, get_team_info
 
-def register_cv_handlers(dp: Dispatcher, db, bot):
-    from handlers.team_handlers import get_main_menu_keyboard, get_team_menu_keyboard
-
-    @dp.message(lambda message: message.text == "🏆 Моє CV", TeamMenu.main)
+    @routes.button("🏆 Моє CV", state=TeamMenu.main)
     async def process_cv_menu(message: types.Message, state: FSMContext):
         await message.answer(
             "Це потрібно, бо Твоє резюме побачать круті компанії. Тому це можливість отримати якусь цікаву пропозицію, яка змінить твоє життя 😉",
@@ -53,7 +39,7 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
         )
         await state.set_state(TeamMenu.cv_menu)
 
-    @dp.message(lambda message: message.text == "🫶🏻 Завантажити нове CV", TeamMenu.cv_menu)
+    @routes.button("🫶🏻 Завантажити нове CV", state=TeamMenu.cv_menu)
     async def process_upload_cv(message: types.Message, state: FSMContext):
         await state.update_data(is_cv_saved=False)
         await message.answer(
@@ -62,7 +48,7 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
         )
         await state.set_state(TeamMenu.upload_cv)
 
-    @dp.message(lambda message: message.text == "Назад", TeamMenu.upload_cv)
+    @routes.button("Назад", state=TeamMenu.upload_cv)
     async def process_back_from_upload_cv(message: types.Message, state: FSMContext):
         user_id = message.from_user.id
         user_data = await state.get_data()
@@ -75,7 +61,7 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
         )
         await state.set_state(TeamMenu.cv_menu)
 
-    @dp.message(TeamMenu.upload_cv)
+    @routes.any(TeamMenu.upload_cv)
     async def process_cv_file(message: types.Message, state: FSMContext, bot):
         user_id = message.from_user.id
         if not message.document:
@@ -92,7 +78,7 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
             return
 
         try:
-            db.save_cv(user_id, message.document.file_id, message.document.file_name)
+            await db.save_cv(user_id, message.document.file_id, message.document.file_name)
             await state.update_data(is_cv_saved=True)
             await message.answer(
                 "Очманіти😳! Твоє CV успішно оновлено! Ти або трішки перебільшуєш свої уміння, або десь з десяти років Сіньйор майстер спорту з усіх видів зламів",
@@ -108,11 +94,11 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
             )
             await state.set_state(TeamMenu.cv_menu)
 
-    @dp.message(lambda message: message.text == "👀 Переглянути моє CV", TeamMenu.cv_menu)
+    @routes.button("👀 Переглянути моє CV", state=TeamMenu.cv_menu)
     async def process_view_cv(message: types.Message, bot):
         user_id = message.from_user.id
         try:
-            cv_data = db.get_cv(user_id)
+            cv_data = await db.get_cv(user_id)
             if cv_data:
                 file_name = cv_data.get("file_name", "cv.pdf")
                 await message.answer("Там все чотінько, я перевірила. Ось твоє останнє CV! ❤️‍🔥")
@@ -134,10 +120,9 @@ def register_cv_handlers(dp: Dispatcher, db, bot):
                 reply_markup=get_cv_menu_keyboard()
             )
 
-    @dp.message(lambda message: message.text == "Назад", TeamMenu.cv_menu)
-    async def process_back_to_team_menu(message: types.Message, state: FSMContext):
-        user_id = message.from_user.id
-        team_info = await get_team_info(db, user_id)
+    @routes.button("Назад", state=TeamMenu.cv_menu)
+    async def process_back_to_team_menu(message: types.Message, state: FSMContext, user_ctx: UserContext):
+        team_info, team = await get_team_info(user_ctx)
         if team_info:
             await message.answer(team_info, reply_markup=get_team_menu_keyboard())
             await state.set_state(TeamMenu.main)
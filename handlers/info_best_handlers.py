@@ -1,8 +1,7 @@
 import logging
-import os
-from aiogram import Dispatcher, types
-from aiogram.types import FSInputFile
-import config
+from aiogram import types
+from routing import ButtonRouter
+from services import AssetStore
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +12,11 @@ def get_back_to_main_menu_keyboard():
         one_time_keyboard=True
     )
 
-def register_info_best_handlers(dp: Dispatcher, db=None, bot=None):
-    @dp.message(lambda message: message.text == "Хто такі BEST Lviv❓")
-    async def process_info_best(message: types.Message):
-        image_path = os.path.join(config.ASSETS_PATH, "best.png")
-        if not os.path.exists(image_path):
-            logger.error(f"Image file not found at {image_path}")
-            await message.answer("‼️ Виникла помилка: зображення best.png не знайдено. Але не хвилюйся, продовжимо!")
-        else:
-            try:
-                photo = FSInputFile(path=image_path)
-                await message.answer_photo(photo=photo, caption="Хто такі BEST Lviv ❓")
-            except Exception as e:
-                logger.error(f"Failed to send best.png: {str(e)}")
-                await message.answer(f"‼️ Виникла помилка при відправки зображення: {str(e)}. Але не хвилюйся, продовжимо!")
+def register_info_best_handlers(routes: ButtonRouter, db=None, bot=None):
+
+    @routes.button("Хто такі BEST Lviv❓")
+    async def process_info_best(message: types.Message, assets: AssetStore):
+        await assets.answer_photo(message, "best.png", caption="Хто такі BEST Lviv ❓")
         
         await message.answer(
             "<b>BEST Lviv</b> — це осередок міжнародної <b>неприбуткової, непартійної, молодіжної організації</b>.\n"
@@ -1,8 +1,7 @@
 import logging
-import os
-from aiogram import Dispatcher, types
-from aiogram.types import FSInputFile
-import config
+from aiogram import types
+from routing import ButtonRouter
+from services import AssetStore
 
 logger = logging.getLogger(__name__)
 
@@ -13,20 +12,11 @@ def get_back_to_main_menu_keyboard():
         one_time_keyboard=True
     )
 
-def register_info_ctf_handlers(dp: Dispatcher, db=None, bot=None):
-    @dp.message(lambda message: message.text == "Інформація про CTF 🚩")
-    async def process_info_ctf(message: types.Message):
-        image_path = os.path.join(config.ASSETS_PATH, "ctf.png")
-        if not os.path.exists(image_path):
-            logger.error(f"Image file not found at {image_path}")
-            await message.answer("‼️ Виникла помилка: зображення ctf.png не знайдено. Але не хвилюйся, продовжимо!")
-        else:
-            try:
-                photo = FSInputFile(path=image_path)
-                await message.answer_photo(photo=photo, caption="Інформація про CTF 🚩")
-            except Exception as e:
-                logger.error(f"Failed to send ctf.png: {str(e)}")
-                await message.answer(f"‼️ Виникла помилка при відправці зображення: {str(e)}. Але не хвилюйся, продовжимо!")
+def register_info_ctf_handlers(routes: ButtonRouter, db=None, bot=None):
+
+    @routes.button("Інформація про CTF 🚩")
+    async def process_info_ctf(message: types.Message, assets: AssetStore):
+        await assets.answer_photo(message, "ctf.png", caption="Інформація про CTF 🚩")
         
         await message.answer(
             "<b>BEST CTF — це командні змагання з кібербезпеки, в яких учасники виконують завдання з різних категорій.</b>\n"
@@ -1,17 +1,16 @@
 import logging
 import random
-import os
-from aiogram import Bot, Dispatcher, types
-from aiogram.filters import CommandStart
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, FSInputFile
+from aiogram import Bot, types
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
 from aiogram.fsm.context import FSMContext
 from states.registration import Registration
 from config import ADMIN_ID, MONGODB_URI
 import config
 from database import Database
-from handlers.info_ctf_handlers import register_info_ctf_handlers
-from handlers.info_best_handlers import register_info_best_handlers
-from handlers.team_handlers import register_team_handlers
+from middlewares import UserContext
+from routing import ButtonRouter
+from services import AssetStore
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -109,9 +108,9 @@ def get_consent_keyboard():
         one_time_keyboard=True
     )
 
-async def send_main_menu(message: types.Message, state: FSMContext, db: Database, registered: bool = False, name: str = None):
-    user_id = message.from_user.id
-    event_state = db.get_event_state()
+async def send_main_menu(message: types.Message, state: FSMContext, user_ctx: UserContext):
+    ctx = await user_ctx.load()
+    event_state = ctx.event_state
     if event_state == "finished":
         await message.answer(
             "Реєстрація та змагання завершені. Дякуємо за участь! 🚩\nЧекаємо вас на BEST CTF 2026! 😎",
@@ -120,13 +119,12 @@ async def send_main_menu(message: types.Message, state: FSMContext, db: Database
         await state.clear()
         return
 
-    if registered:
-        participant = db.participants.find_one({"user_id": user_id})
+    if ctx.registered:
         is_participant = False
-        if participant and participant.get("team_id"):
-            team_status = db.get_team_status(participant["team_id"])
-            is_participant = team_status["is_participant"]
-            if event_state in ["test_task", "main_task"] and not team_status["test_task_status"]:
+        if ctx.participant.team_id:
+            team_status = ctx.team_status
+            is_participant = team_status.is_participant
+            if event_state in ["test_task", "main_task"] and not team_status.test_task_status:
                 await message.answer(
                     "Шкода, але ваша команда не пройшла на змагання. 😢\n"
                     "Не переймайтеся, наступного року також буде CTF! 🚩\n"
@@ -181,88 +179,67 @@ async def send_main_menu(message: types.Message, state: FSMContext, db: Database
             )
     await state.clear()
 
-def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
-    register_team_handlers(dp, db, bot)
-    register_info_ctf_handlers(dp, db, bot)
-    register_info_best_handlers(dp, db, bot)
+def register_user_handlers(routes: ButtonRouter, db: Database, bot: Bot):
 
-    @dp.message(CommandStart())
-    async def start_command(message: types.Message, state: FSMContext):
-        user_id = message.from_user.id
+    @routes.command("start")
+    async def start_command(message: types.Message, state: FSMContext, user_ctx: UserContext):
         await state.clear()  
-        if db.is_user_registered(user_id):
-            name = db.get_user_data(user_id)
-            await send_main_menu(message, state, db, registered=True, name=name)
-        else:
-            await send_main_menu(message, state, db)
+        await db.unsuppress_chat(message.chat.id)
+        await send_main_menu(message, state, user_ctx)
 
-    @dp.message(lambda message: message.text == "🚩 CTF завдання" and db.get_event_state() == "main_task")
-    async def process_main_task(message: types.Message, state: FSMContext):
+    @routes.button("🚩 CTF завдання", conditional=True)
+    async def process_main_task(message: types.Message, state: FSMContext, raw_state: str, user_ctx: UserContext, assets: AssetStore):
+        if raw_state in Registration:
+            raise SkipHandler()
         user_id = message.from_user.id
-        event_state = db.get_event_state()
+        ctx = await user_ctx.load()
+        event_state = ctx.event_state
+        if event_state != "main_task":
+            if not ctx.registered:
+                await send_main_menu(message, state, user_ctx)
+            return
         logger.info(f"process_main_task called for user {user_id}, event_state={event_state}")
-        participant = db.participants.find_one({"user_id": user_id})
-        if not participant or not participant.get("team_id"):
+        if not ctx.registered or not ctx.participant.team_id:
             await message.answer(
                 "Ви не в команді! Приєднайтесь до команди, щоб отримати доступ до CTF завдання. 🚩",
                 reply_markup=get_main_menu_keyboard(is_participant=False, event_state=event_state)
             )
             return
-        team_status = db.get_team_status(participant["team_id"])
-        if not team_status["is_participant"] or not team_status["test_task_status"]:
+        team_status = ctx.team_status
+        if not team_status.is_participant or not team_status.test_task_status:
             await message.answer(
                 "Ваша команда ще не пройшла тестове завдання. Завершіть його, щоб отримати доступ до основного CTF завдання! 🚩",
                 reply_markup=get_main_menu_keyboard(is_participant=False, event_state=event_state)
             )
             return
-        pdf_path = os.path.join(config.ASSETS_PATH, "main_task.pdf")
-        if not os.path.exists(pdf_path):
-            logger.error(f"PDF file not found at {pdf_path}")
-            await message.answer("‼️ Виникла помилка: файл main_task.pdf не знайдено. Зверніться до організаторів!")
-        else:
-            try:
-                document = FSInputFile(path=pdf_path)
-                await message.answer_document(document=document, caption="🚩 Основне CTF завдання для вашої команди!")
-            except Exception as e:
-                logger.error(f"Failed to send main_task.pdf: {str(e)}")
-                await message.answer(f"‼️ Виникла помилка при відправці файлу: {str(e)}. Зверніться до організаторів!")
+        await assets.answer_document(message, "main_task.pdf", caption="🚩 Основне CTF завдання для вашої команди!", on_error="Зверніться до організаторів!")
         await message.answer(
             "Це ваше основне CTF завдання! Виконайте його та надішліть відповідь організаторам.",
             reply_markup=get_main_menu_keyboard(is_participant=True, event_state=event_state)
         )
 
-    @dp.message(lambda message: message.text == "Зареєструватись у CTF-2025! 📝")
-    async def process_register(message: types.Message, state: FSMContext):
-        if db.get_event_state() != "registration":
+    @routes.button("Зареєструватись у CTF-2025! 📝")
+    async def process_register(message: types.Message, state: FSMContext, user_ctx: UserContext, assets: AssetStore):
+        ctx = await user_ctx.load()
+        if ctx.event_state != "registration":
             await message.answer(
                 "Реєстрація завершена, дякуємо за інтерес! Спробуйте наступного року. 🚩",
                 reply_markup=None
             )
             return
-        if db.is_user_registered(message.from_user.id):
-            name = db.get_user_data(message.from_user.id)
-            await send_main_menu(message, state, db, registered=True, name=name)
+        if ctx.registered:
+            await send_main_menu(message, state, user_ctx)
             return
-        image_path = os.path.join(config.ASSETS_PATH, "register.png")
-        if not os.path.exists(image_path):
-            logger.error(f"Image file not found at {image_path}")
-            await message.answer("‼️ Виникла помилка: зображення register.png не знайдено. Але не хвилюйся, продовжимо реєстрацію!")
-        else:
-            try:
-                photo = FSInputFile(path=image_path)
-                await message.answer_photo(photo=photo, caption="🚩 Починаємо реєстрацію в CTF-2025! 🚩")
-            except Exception as e:
-                logger.error(f"Failed to send register.png: {str(e)}")
-                await message.answer(f"‼️ Виникла помилка при відправці зображення: {str(e)}. Але не хвилюйся, продовжимо реєстрацію!")
+        await assets.answer_photo(message, "register.png", caption="🚩 Починаємо реєстрацію в CTF-2025! 🚩", on_error="Але не хвилюйся, продовжимо реєстрацію!")
         await message.answer("♦️ Введи своє ім'я:")
         await state.set_state(Registration.name)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.name)
+    @routes.media(Registration.name)
     async def process_invalid_media_name(message: types.Message, state: FSMContext):
         await message.answer("♦️ Введи своє ім'я:\n‼️ Будь ласка, надсилай тільки текст! Не стікери, фото, GIF чи відео.")
         return
 
-    @dp.message(Registration.name)
+    @routes.any(Registration.name)
     async def process_name(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Введи своє ім'я:\n‼️ Будь ласка, надсилай тільки текст! Не фото, гіфки, стікери чи голосові повідомлення.")
@@ -276,12 +253,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("Про таке не дуже гарно питати, але все ж 😅 \n♦️ Скільки тобі років? :")
         await state.set_state(Registration.age)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.age)
+    @routes.media(Registration.age)
     async def process_invalid_media_age(message: types.Message, state: FSMContext):
         await message.answer("♦️ Скільки тобі років? :\n‼️ Будь ласка, надсилай тільки текст! Не стікери, фото, GIF чи відео.")
         return
 
-    @dp.message(Registration.age)
+    @routes.any(Registration.age)
     async def process_age(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Скільки тобі років? :\n‼️ Будь ласка, надсилай тільки текст! Не фото, гіфки, стікери чи голосові повідомлення.")
@@ -296,12 +273,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("♦️ Вибери свій університет 🎓 або введи власний:", reply_markup=get_universities_keyboard())
         await state.set_state(Registration.university)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.university)
+    @routes.media(Registration.university)
     async def process_invalid_media_university(message: types.Message, state: FSMContext):
         await message.answer("♦️ Вибери свій університет 🎓 або введи власний:\n‼️ Будь ласка, надсилай тільки текст або натискай на кнопки! Не стікери, фото, GIF чи відео.", reply_markup=get_universities_keyboard())
         return
 
-    @dp.message(Registration.university)
+    @routes.any(Registration.university)
     async def process_university(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Вибери свій університет 🎓 або введи власний:\n‼️ Будь ласка, вибери варіант із кнопок або введи текст!", reply_markup=get_universities_keyboard())
@@ -320,12 +297,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
             await message.answer("♦️ Введи свою спеціальність:")
             await state.set_state(Registration.specialty)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.new_university)
+    @routes.media(Registration.new_university)
     async def process_invalid_media_new_university(message: types.Message, state: FSMContext):
         await message.answer("♦️ Введи назву свого університету:\n‼️ Будь ласка, надсилай тільки текст! Не стікери, фото, GIF чи відео.")
         return
 
-    @dp.message(Registration.new_university)
+    @routes.any(Registration.new_university)
     async def process_new_university(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Введи назву свого університету:\n‼️ Будь ласка, надсилай тільки текст! Не фото, гіфки, стікери чи голосові повідомлення.")
@@ -341,12 +318,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("♦️ Введи свою спеціальність:")
         await state.set_state(Registration.specialty)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.specialty)
+    @routes.media(Registration.specialty)
     async def process_invalid_media_specialty(message: types.Message, state: FSMContext):
         await message.answer("♦️ Введи свою спеціальність:\n‼️ Будь ласка, надсилай тільки текст! Не стікери, фото, GIF чи відео.")
         return
 
-    @dp.message(Registration.specialty)
+    @routes.any(Registration.specialty)
     async def process_specialty(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Введи свою спеціальність:\n‼️ Будь ласка, надсилай тільки текст! Не фото, гіфки, стікери чи голосові повідомлення.")
@@ -360,30 +337,30 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("♦️ Вибери свій курс 🤓:", reply_markup=get_courses_keyboard())
         await state.set_state(Registration.course)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.course)
+    @routes.media(Registration.course)
     async def process_invalid_media_course(message: types.Message, state: FSMContext):
         await message.answer("♦️ Вибери свій курс 🤓:\n‼️ Будь ласка, натискай на кнопки! Не надсилай стікери, фото, GIF чи відео.", reply_markup=get_courses_keyboard())
         return
 
-    @dp.message(lambda message: message.text in COURSES, Registration.course)
+    @routes.button(*COURSES, state=Registration.course)
     async def process_course(message: types.Message, state: FSMContext):
         await state.update_data(course=message.text)
         await message.answer("♦️ Як тебе занесло на змагання? 📢", reply_markup=get_source_keyboard())
         await state.set_state(Registration.source)
 
-    @dp.message(Registration.course)
+    @routes.any(Registration.course)
     async def process_invalid_course(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Вибери свій курс 🤓:\n‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_courses_keyboard())
             return
         await message.answer("♦️ Вибери свій курс 🤓:\n‼️ Будь ласка, вибери один із варіантів нижче:", reply_markup=get_courses_keyboard())
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.source)
+    @routes.media(Registration.source)
     async def process_invalid_media_source(message: types.Message, state: FSMContext):
         await message.answer("♦️ Як тебе занесло на змагання? 📢\n‼️ Будь ласка, натискай на кнопки! Не надсилай стікери, фото, GIF чи відео.", reply_markup=get_source_keyboard())
         return
 
-    @dp.message(lambda message: message.text in ["Instagram", "LinkedIn", "TikTok", "Друзі", "Представники університету", "Живі оголошення/інфостійки", "Інше"], Registration.source)
+    @routes.button("Instagram", "LinkedIn", "TikTok", "Друзі", "Представники університету", "Живі оголошення/інфостійки", "Інше", state=Registration.source)
     async def process_source(message: types.Message, state: FSMContext):
         if message.text == "Інше":
             await message.answer("Ого, цікаво! Введи, звідки саме ти знаєш про BEST CTF:")
@@ -394,19 +371,19 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
             await message.answer("♦️ Поділись своїм контактом 📱 (натисни кнопку нижче)", reply_markup=get_contact_keyboard())
             await state.set_state(Registration.contact)
 
-    @dp.message(Registration.source)
+    @routes.any(Registration.source)
     async def process_invalid_source(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Як тебе занесло на змагання? 📢\n‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_source_keyboard())
             return
         await message.answer("♦️ Як тебе занесло на змагання? 📢\n‼️ Будь ласка, вибери один із варіантів нижче:", reply_markup=get_source_keyboard())
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.custom_source)
+    @routes.media(Registration.custom_source)
     async def process_invalid_media_custom_source(message: types.Message, state: FSMContext):
         await message.answer("♦️ Введи, звідки саме ти знаєш про BEST CTF:\n‼️ Будь ласка, надсилай тільки текст! Не стікери, фото, GIF чи відео.")
         return
 
-    @dp.message(Registration.custom_source)
+    @routes.any(Registration.custom_source)
     async def process_custom_source(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Введи, звідки саме ти знаєш про BEST CTF:\n‼️ Будь ласка, надсилай тільки текст! Не фото, гіфки, стікери чи голосові повідомлення.")
@@ -420,12 +397,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("♦️ Поділись своїм контактом 📱 (натисни кнопку нижче)", reply_markup=get_contact_keyboard())
         await state.set_state(Registration.contact)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.contact)
+    @routes.media(Registration.contact)
     async def process_invalid_media_contact(message: types.Message, state: FSMContext):
         await message.answer("♦️ Поділись своїм контактом 📱 (натисни кнопку нижче)\n‼️ Будь ласка, натискай на кнопки! Не надсилай стікери, фото, GIF чи відео.", reply_markup=get_contact_keyboard())
         return
 
-    @dp.message(Registration.contact)
+    @routes.any(Registration.contact)
     async def process_contact(message: types.Message, state: FSMContext):
         if message.contact:
             await state.update_data(phone=message.contact.phone_number)
@@ -440,7 +417,7 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
                 await state.set_state(Registration.name)
                 return
             try:
-                db.add_participant(
+                await db.add_participant(
                     user_id,
                     user_data["name"],
                     user_data["age"],
@@ -466,12 +443,12 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
             else:
                 await message.answer("♦️ Поділись своїм контактом 📱 (натисни кнопку нижче)\n‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_contact_keyboard())
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.check_data)
+    @routes.media(Registration.check_data)
     async def process_invalid_media_check_data(message: types.Message, state: FSMContext):
         await message.answer("♦️ Перед тим, як завершити реєстрацію, перевір, чи добре введено особисті дані. 😌\n‼️ Будь ласка, натискай на кнопки! Не надсилай стікери, фото, GIF чи відео.", reply_markup=get_check_data_keyboard())
         return
 
-    @dp.message(lambda message: message.text in ["Правильно ✅", "Неправильно ❌"], Registration.check_data)
+    @routes.button("Правильно ✅", "Неправильно ❌", state=Registration.check_data)
     async def process_check_data(message: types.Message, state: FSMContext):
         if message.text == "Правильно ✅":
             await message.answer("Чудово! 😊 Тепер підтверди згоду на обробку даних:", reply_markup=get_consent_keyboard())
@@ -481,33 +458,33 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
             await message.answer("♦️ Введи своє ім'я:")
             await state.set_state(Registration.name)
 
-    @dp.message(Registration.check_data)
+    @routes.any(Registration.check_data)
     async def process_invalid_check_data(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Перед тим, як завершити реєстрацію, перевір, чи добре введено особисті дані. 😌\n‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_check_data_keyboard())
             return
         await message.answer("♦️ Перед тим, як завершити реєстрацію, перевір, чи добре введено особисті дані. 😌\n‼️ Будь ласка, вибери одну з кнопок нижче:", reply_markup=get_check_data_keyboard())
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation, Registration.data_consent)
+    @routes.media(Registration.data_consent)
     async def process_invalid_media_consent(message: types.Message, state: FSMContext):
         await message.answer("♦️ Підтверди згоду на обробку даних:\n‼️ Будь ласка, натискай на кнопки! Не надсилай стікери, фото, GIF чи відео.", reply_markup=get_consent_keyboard())
         return
 
-    @dp.message(lambda message: message.text in ["✅ Погоджуюсь", "❌ Відмовляюсь"], Registration.data_consent)
-    async def process_data_consent(message: types.Message, state: FSMContext):
+    @routes.button("✅ Погоджуюсь", "❌ Відмовляюсь", state=Registration.data_consent)
+    async def process_data_consent(message: types.Message, state: FSMContext, user_ctx: UserContext):
         if message.text == "✅ Погоджуюсь":
             user_id = message.from_user.id
             await state.update_data(data_consent=True)
             try:
-                db.participants.update_one({"user_id": user_id}, {"$set": {"data_consent": True}})
-                logger.info(f"Updated data_consent for user {user_id}")
+                await db.set_data_consent(user_id, True)
             except Exception as e:
                 logger.error(f"Failed to update data_consent for user {user_id}: {e}")
                 await message.answer("‼️ Виникла помилка при збереженні згоди. Спробуй ще раз!")
                 await state.clear()
                 return
             await message.answer("Круто! Коли буду готувати атаку на пентагон, буду знати, куди телефонувати😏")
-            await send_main_menu(message, state, db, registered=True, name=(await state.get_data())["name"])
+            await user_ctx.reload()
+            await send_main_menu(message, state, user_ctx)
         else:
             await message.answer(
                 "Наша команда збирає особисту інформацію учасників лише задля загальної статистики події 🥹\n"
@@ -515,16 +492,16 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
                 reply_markup=get_consent_keyboard()
             )
 
-    @dp.message(Registration.data_consent)
+    @routes.any(Registration.data_consent)
     async def process_invalid_consent(message: types.Message, state: FSMContext):
         if not message.text:
             await message.answer("♦️ Підтверди згоду на обробку даних:\n‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_consent_keyboard())
             return
         await message.answer("♦️ Підтверди згоду на обробку даних:\n‼️ Будь ласка, вибери одну з кнопок нижче:", reply_markup=get_consent_keyboard())
 
-    @dp.message(lambda message: message.text == "Ще раз зареєструватися 📝")
-    async def process_re_register(message: types.Message, state: FSMContext):
-        if db.get_event_state() != "registration":
+    @routes.button("Ще раз зареєструватися 📝")
+    async def process_re_register(message: types.Message, state: FSMContext, user_ctx: UserContext):
+        if (await user_ctx.load()).event_state != "registration":
             await message.answer(
                 "Реєстрація завершена, дякуємо за інтерес! Спробуйте наступного року. 🚩",
                 reply_markup=None
@@ -534,41 +511,14 @@ def register_user_handlers(dp: Dispatcher, db: Database, bot: Bot):
         await message.answer("♦️ Введи своє ім'я:")
         await state.set_state(Registration.name)
 
-    @dp.message(lambda message: message.sticker or message.photo or message.video or message.animation)
-    async def process_invalid_media_main(message: types.Message, state: FSMContext):
-        user_id = message.from_user.id
-        if db.is_user_registered(user_id):
-            name = db.get_user_data(user_id)
-            await message.answer("‼️ Будь ласка, надсилай тільки текст або натискай на кнопки! Не стікери, фото, GIF чи відео.")
-            await send_main_menu(message, state, db, registered=True, name=name)
-        else:
-            await message.answer("‼️ Будь ласка, надсилай тільки текст або натискай на кнопки! Не стікери, фото, GIF чи відео.")
-            await send_main_menu(message, state, db)
+    @routes.media()
+    async def process_invalid_media_main(message: types.Message, state: FSMContext, user_ctx: UserContext):
+        await message.answer("‼️ Будь ласка, надсилай тільки текст або натискай на кнопки! Не стікери, фото, GIF чи відео.")
+        await send_main_menu(message, state, user_ctx)
 
-    @dp.message(lambda message: message.text not in ["Інформація про CTF 🚩", "Хто такі BEST Lviv❓", "Моя команда 🫱🏻‍🫲🏿", "🚩 CTF завдання"])
-    async def process_invalid_info_response(message: types.Message, state: FSMContext):
+    @routes.any()
+    async def process_invalid_info_response(message: types.Message, state: FSMContext, user_ctx: UserContext):
         if not message.text:
             await message.answer("‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.", reply_markup=get_main_menu_keyboard())
             return
-        user_id = message.from_user.id
-        if db.is_user_registered(user_id):
-            name = db.get_user_data(user_id)
-            await send_main_menu(message, state, db, registered=True, name=name)
-        else:
-            await send_main_menu(message, state, db)
-
-    @dp.message(lambda message: message.text not in ["Інформація про CTF 🚩", "Хто такі BEST Lviv❓", "Моя команда 🫱🏻‍🫲🏿", "🚩 CTF завдання"] and db.is_user_registered(message.from_user.id))
-    async def process_invalid_main_menu(message: types.Message, state: FSMContext):
-        if not message.text:
-            name = db.get_user_data(message.from_user.id)
-            await message.answer("‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.")
-            await send_main_menu(message, state, db, registered=True, name=name)
-            return
-        name = db.get_user_data(message.from_user.id)
-        await send_main_menu(message, state, db, registered=True, name=name)
-
-    @dp.message(lambda message: message.text != "Зареєструватись у CTF-2025! 📝" and not db.is_user_registered(message.from_user.id))
-    async def process_invalid_start(message: types.Message, state: FSMContext):
-        if not message.text:
-            await message.answer("‼️ Будь ласка, натискай на кнопки! Не надсилай фото, гіфки, стікери чи голосові повідомлення.")
-        await send_main_menu(message, state, db)
\ No newline at end of file
+        await send_main_menu(message, state, user_ctx)
\ No newline at end of file
@@ -2,6 +2,7 @@ import os
 import sys
 import config
 import psutil
+import signal
 import asyncio
 import logging
 from aiogram import Bot, Dispatcher
@@ -11,12 +12,15 @@ from handlers.info_ctf_handlers import register_info_ctf_handlers
 from handlers.info_best_handlers import register_info_best_handlers
 from handlers.team_handlers import register_team_handlers
 from handlers.cv_handlers import register_cv_handlers
-from database import Database
+from database import CachedFSMStorage, create_database
+from middlewares import FSMFlushMiddleware, ThrottleMiddleware, UserContextMiddleware, UserEventIsolation
+from routing import HandlerRegistry
+from services import AssetOptimizer, AssetRegistry, AssetStore, BroadcastEngine, OutboundScheduler, WorkerPool, consume_updates, poll_updates, register_webhook, run_webhook, serve_webhook
 
 logger = logging.getLogger(__name__)
 
 async def main():
-    required_vars = ["BOT_TOKEN", "MONGODB_URI"]
+    required_vars = ["BOT_TOKEN", "MONGODB_URI"] if config.STORAGE_BACKEND == "mongo" else ["BOT_TOKEN"]
     missing_vars = [var for var in required_vars if not os.getenv(var)]
     if missing_vars:
         logger.error(f"Missing environment variables: {', '.join(missing_vars)}")
@@ -28,45 +32,210 @@ async def main():
         print("Error: BOT_TOKEN is not set or is None")
         return
 
+    if config.BOT_MODE not in ("polling", "webhook"):
+        logger.error(f"Unknown BOT_MODE: {config.BOT_MODE}. Must be one of ['polling', 'webhook']")
+        print(f"Error: Unknown BOT_MODE: {config.BOT_MODE}")
+        return
+
+    if config.BOT_MODE == "webhook" and not config.WEBHOOK_SECRET:
+        logger.error("WEBHOOK_SECRET is required in webhook mode")
+        print("Error: WEBHOOK_SECRET is required in webhook mode")
+        return
+
+    if config.BOT_WORKERS > 1:
+        if config.STORAGE_BACKEND != "mongo":
+            logger.error("BOT_WORKERS > 1 requires STORAGE_BACKEND=mongo")
+            print("Error: BOT_WORKERS > 1 requires STORAGE_BACKEND=mongo")
+            return
+        await supervise()
+        return
+
     bot = Bot(token=config.BOT_TOKEN)
-    dp = Dispatcher()
+    app = await build_app(bot)
+    if app is None:
+        return
+    dp, db, asset_registry, fsm_storage, broadcast_engine = app
+    background = start_background(dp, db, asset_registry, fsm_storage, broadcast_engine)
+    await resume_broadcasts(broadcast_engine)
+
     try:
-        db = Database(config.MONGODB_URI)
+        if config.BOT_MODE == "webhook":
+            logger.info("Starting webhook server")
+            print("Starting webhook server...")
+            await run_webhook(dp, bot, config.WEBHOOK_HOST, config.WEBHOOK_PORT, config.WEBHOOK_PATH, config.WEBHOOK_SECRET, base_url=config.WEBHOOK_URL)
+        else:
+            logger.info("Starting bot polling")
+            print("Starting bot polling...")
+            await bot.delete_webhook()
+            await dp.start_polling(bot)
+    except Exception as e:
+        logger.error(f"Error running bot: {e}")
+        print(f"Error running bot: {e}")
+    finally:
+        await shutdown(bot, db, background, broadcast_engine)
+
+async def build_app(bot, migrate=True):
+    try:
+        db = create_database(config.STORAGE_BACKEND, config.MONGODB_URI, event_state_ttl=config.EVENT_STATE_TTL, batch_size=config.DB_BATCH_SIZE)
+        await db.init()
+        if migrate:
+            await db.migrate()
     except Exception as e:
         logger.error(f"Failed to initialize database: {e}")
         print(f"Error: Failed to initialize database: {e}")
-        return
+        return None
+
+    fsm_storage = CachedFSMStorage(db, ttl=config.FSM_STATE_TTL, sweep_interval=config.FSM_SWEEP_INTERVAL, group_ttls=config.FSM_GROUP_TTLS, revalidate=config.FSM_REVALIDATE)
+    user_locks = UserEventIsolation(max_users=config.USER_LOCK_MAX_USERS)
+    dp = Dispatcher(storage=fsm_storage, events_isolation=user_locks)
+    dp["user_locks"] = user_locks
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(ThrottleMiddleware(
+        rate=config.THROTTLE_RATE,
+        burst=config.THROTTLE_BURST,
+        group_limits=config.THROTTLE_GROUP_LIMITS,
+        exempt_ids=config.ADMIN_ID,
+        notice="‼️ Не так швидко! Зачекай кілька секунд і спробуй ще раз 🙏",
+        fsm=dp.fsm
+    ))
+    dp.update.outer_middleware(dp.fsm)
+    dp.update.outer_middleware(FSMFlushMiddleware(fsm_storage))
+    dp.message.outer_middleware(UserContextMiddleware(db))
+    asset_optimizer = AssetOptimizer(config.ASSETS_CACHE_PATH, max_bytes=config.ASSETS_MAX_BYTES) if config.OPTIMIZE_ASSETS else None
+    asset_registry = AssetRegistry(config.ASSETS_PATH, poll_interval=config.ASSETS_POLL_INTERVAL, optimizer=asset_optimizer)
+    asset_registry.scan()
+    asset_registry.check_expected()
+    dp["assets"] = AssetStore(db, asset_registry)
+    outbound = OutboundScheduler(
+        global_rate=config.TELEGRAM_GLOBAL_RATE / config.BOT_WORKERS,
+        chat_rate=config.TELEGRAM_CHAT_RATE,
+        chat_burst=config.TELEGRAM_CHAT_BURST,
+        lane_rates={"bulk": config.BROADCAST_RATE}
+    )
+    bot.session.middleware(outbound)
+    dp["outbound"] = outbound
+    broadcast_engine = BroadcastEngine(bot, db, concurrency=config.BROADCAST_CONCURRENCY, batch_size=config.DB_BATCH_SIZE, lease=config.BROADCAST_LEASE, max_attempts=config.BROADCAST_MAX_ATTEMPTS)
 
     print("Registering handlers...")
     try:
-        register_admin_handlers(dp, db, bot)
+        registry = HandlerRegistry(dp)
+        registry.include("admin", register_admin_handlers, db, bot, broadcast_engine)
         print("Admin handlers registered")
-        register_user_handlers(dp, db, bot)
-        print("User handlers registered")
-        register_info_ctf_handlers(dp, db, bot)
+        registry.include("cv", register_cv_handlers, db, bot)
+        print("CV handlers registered")
+        registry.include("team", register_team_handlers, db, bot)
+        print("Team handlers registered")
+        registry.include("info_ctf", register_info_ctf_handlers, db, bot)
         print("Info CTF handlers registered")
-        register_info_best_handlers(dp, db, bot)
+        registry.include("info_best", register_info_best_handlers, db, bot)
         print("Info BEST handlers registered")
-        register_team_handlers(dp, db, bot)
-        print("Team handlers registered")
-        register_cv_handlers(dp, db, bot)
-        print("CV handlers registered")
+        registry.include("user", register_user_handlers, db, bot)
+        print("User handlers registered")
+        registry.check()
     except Exception as e:
         logger.error(f"Error registering handlers: {e}")
         print(f"Error registering handlers: {e}")
         raise
 
+    return dp, db, asset_registry, fsm_storage, broadcast_engine
+
+def start_background(dp, db, asset_registry, fsm_storage, broadcast_engine):
+    return [
+        asyncio.create_task(db.watch_event_state()),
+        asyncio.create_task(asset_registry.watch()),
+        asyncio.create_task(fsm_storage.watch()),
+        asyncio.create_task(broadcast_engine.watch()),
+        asyncio.create_task(dp["user_locks"].watch(config.METRICS_INTERVAL)),
+        asyncio.create_task(dp["outbound"].watch(config.METRICS_INTERVAL)),
+    ]
+
+async def resume_broadcasts(broadcast_engine):
     try:
-        logger.info("Starting bot polling")
-        print("Starting bot polling...")
-        await dp.start_polling(bot)
+        resumed_jobs = await broadcast_engine.resume()
+        if resumed_jobs:
+            print(f"Resumed {resumed_jobs} unfinished broadcast job(s)")
     except Exception as e:
-        logger.error(f"Error running bot: {e}")
-        print(f"Error running bot: {e}")
+        logger.error(f"Error resuming broadcast jobs: {e}")
+
+async def shutdown(bot, db, background, broadcast_engine):
+    for task in background:
+        task.cancel()
+    await broadcast_engine.stop()
+    await bot.session.close()
+    db.close()
+    logger.info("Bot stopped")
+    print("Bot stopped")
+
+async def supervise():
+    try:
+        db = create_database(config.STORAGE_BACKEND, config.MONGODB_URI)
+        await db.init()
+        await db.migrate()
+        db.close()
+    except Exception as e:
+        logger.error(f"Failed to initialize database: {e}")
+        print(f"Error: Failed to initialize database: {e}")
+        return
+
+    pool = WorkerPool(run_worker, config.BOT_WORKERS)
+    pool.start()
+    print(f"Started {config.BOT_WORKERS} workers")
+    bot = Bot(token=config.BOT_TOKEN)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    try:
+        if config.BOT_MODE == "webhook":
+            if config.WEBHOOK_URL:
+                await register_webhook(bot, config.WEBHOOK_URL, config.WEBHOOK_PATH, config.WEBHOOK_SECRET)
+            receiver = asyncio.create_task(serve_webhook(pool, config.WEBHOOK_HOST, config.WEBHOOK_PORT, config.WEBHOOK_PATH, config.WEBHOOK_SECRET))
+        else:
+            await bot.delete_webhook()
+            receiver = asyncio.create_task(poll_updates(config.BOT_TOKEN, pool))
+        print("Supervisor is receiving updates...")
+        watcher = asyncio.create_task(pool.watch())
+        stopped = asyncio.create_task(stop.wait())
+        await asyncio.wait([receiver, stopped], return_when=asyncio.FIRST_COMPLETED)
+        if receiver.done() and receiver.exception():
+            logger.error(f"Error receiving updates: {receiver.exception()}")
+        receiver.cancel()
+        watcher.cancel()
+        stopped.cancel()
+    except Exception as e:
+        logger.error(f"Error running supervisor: {e}")
+        print(f"Error running supervisor: {e}")
     finally:
+        await asyncio.to_thread(pool.stop)
         await bot.session.close()
-        logger.info("Bot stopped")
-        print("Bot stopped")
+        print("Supervisor stopped")
+
+def run_worker(index, queue):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(worker(index, queue))
+
+async def worker(index, queue):
+    def stop():
+        logger.info(f"Worker {index} got SIGTERM, finishing queued updates before shutdown")
+        queue.put_nowait(None)
+
+    asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop)
+    bot = Bot(token=config.BOT_TOKEN)
+    app = await build_app(bot, migrate=False)
+    if app is None:
+        return
+    dp, db, asset_registry, fsm_storage, broadcast_engine = app
+    background = start_background(dp, db, asset_registry, fsm_storage, broadcast_engine)
+    await resume_broadcasts(broadcast_engine)
+    try:
+        await dp.emit_startup(bot=bot)
+        logger.info(f"Worker {index} is handling updates")
+        await consume_updates(dp, bot, queue)
+    except Exception as e:
+        logger.error(f"Error in worker {index}: {e}")
+    finally:
+        await dp.emit_shutdown(bot=bot)
+        await shutdown(bot, db, background, broadcast_engine)
 
 if __name__ == "__main__":
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,4 @@
+from .fsm_flush import FSMFlushMiddleware
+from .throttle import ThrottleMiddleware
+from .user_context import UserContext, UserContextMiddleware
+from .user_lock import UserEventIsolation, UserLock
\ No newline at end of file
@@ -0,0 +1,19 @@
+import logging
+from aiogram import BaseMiddleware
+
+logger = logging.getLogger(__name__)
+
+class FSMFlushMiddleware(BaseMiddleware):
+    def __init__(self, storage):
+        self.storage = storage
+
+    async def __call__(self, handler, event, data):
+        try:
+            return await handler(event, data)
+        finally:
+            state = data.get("state")
+            if state is not None:
+                try:
+                    await self.storage.flush(state.key)
+                except Exception as e:
+                    logger.error(f"Failed to flush FSM record {state.key}: {e}")
@@ -0,0 +1,80 @@
+import logging
+import time
+from collections import OrderedDict
+from aiogram import BaseMiddleware
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_GROUP = "default"
+
+class ThrottleMiddleware(BaseMiddleware):
+    def __init__(self, rate=1.0, burst=5, group_limits=None, exempt_ids=(), max_users=50000, notice=None, fsm=None):
+        self.default_limits = (rate, burst)
+        self.fsm = fsm
+        self.group_limits = group_limits or {}
+        self.exempt_ids = set(exempt_ids)
+        self.max_users = max_users
+        self.notice = notice
+        self.idle_after = max(burst / rate for rate, burst in [self.default_limits, *self.group_limits.values()])
+        self.buckets = OrderedDict()
+        self.passed = 0
+        self.dropped = 0
+        self.evicted = 0
+
+    def _group(self, raw_state):
+        return raw_state.rsplit(":", 1)[0] if raw_state else DEFAULT_GROUP
+
+    def _raw_state(self, data):
+        if self.fsm is None:
+            return data.get("raw_state")
+        context = self.fsm.resolve_event_context(data["bot"], data)
+        return self.fsm.storage.peek_state(context.key) if context else None
+
+    def _evict(self, now):
+        while self.buckets:
+            key, bucket = next(iter(self.buckets.items()))
+            if len(self.buckets) <= self.max_users and now - bucket[1] < self.idle_after:
+                return
+            del self.buckets[key]
+            self.evicted += 1
+
+    def _take(self, key, rate, burst, now):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = [burst, now, False]
+            self._evict(now)
+        else:
+            self.buckets.move_to_end(key)
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            bucket[2] = False
+            return True, False
+        first_drop = not bucket[2]
+        bucket[2] = True
+        return False, first_drop
+
+    @property
+    def metrics(self):
+        return {"users": len(self.buckets), "passed": self.passed, "dropped": self.dropped, "evicted": self.evicted}
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is None or user.id in self.exempt_ids:
+            return await handler(event, data)
+        group = self._group(self._raw_state(data))
+        rate, burst = self.group_limits.get(group, self.default_limits)
+        allowed, first_drop = self._take((user.id, group), rate, burst, time.monotonic())
+        if allowed:
+            self.passed += 1
+            return await handler(event, data)
+        self.dropped += 1
+        if first_drop:
+            logger.warning(f"Throttling user {user.id} in {group} (limit {rate}/s, burst {burst})")
+            if self.notice and event.message:
+                try:
+                    await event.message.answer(self.notice)
+                except Exception as e:
+                    logger.error(f"Failed to send throttle notice to user {user.id}: {e}")
+        return None
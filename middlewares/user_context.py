@@ -0,0 +1,72 @@
+import logging
+from aiogram import BaseMiddleware
+from database import Database
+from database.models import TeamStatus
+from database.query_counter import query_counter
+
+logger = logging.getLogger(__name__)
+
+class UserContext:
+    def __init__(self, db: Database, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.participant = None
+        self.team = None
+        self.event_state = None
+        self._loaded = False
+
+    async def load(self):
+        if not self._loaded:
+            self.participant, self.team = await self.db.get_user_context(self.user_id)
+            self.event_state = await self.db.get_event_state()
+            self._loaded = True
+        return self
+
+    async def reload(self):
+        self._loaded = False
+        return await self.load()
+
+    @property
+    def registered(self):
+        return self.participant is not None
+
+    @property
+    def name(self):
+        return self.participant.name if self.participant else "друже"
+
+    @property
+    def in_team(self):
+        return self.team is not None
+
+    @property
+    def team_status(self):
+        if self.team:
+            return self.team["status"]
+        return TeamStatus()
+
+class UserContextMiddleware(BaseMiddleware):
+    def __init__(self, db: Database):
+        self.db = db
+        self.updates = 0
+        self.queries = 0
+        self.max_queries = 0
+
+    @property
+    def average_queries(self):
+        return self.queries / self.updates if self.updates else 0.0
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        data["user_ctx"] = UserContext(self.db, user.id)
+        counter = [0]
+        token = query_counter.set(counter)
+        try:
+            return await handler(event, data)
+        finally:
+            query_counter.reset(token)
+            self.updates += 1
+            self.queries += counter[0]
+            self.max_queries = max(self.max_queries, counter[0])
+            logger.debug(f"Update from user {user.id} used {counter[0]} DB queries (avg {self.average_queries:.2f}, max {self.max_queries})")
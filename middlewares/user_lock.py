@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from aiogram.fsm.storage.base import BaseEventIsolation
+
+logger = logging.getLogger(__name__)
+
+class UserLock:
+    __slots__ = ("lock", "pending", "warned_at")
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.pending = 0
+        self.warned_at = None
+
+class UserEventIsolation(BaseEventIsolation):
+    def __init__(self, max_users=10000, warn_depth=5, warn_interval=60.0):
+        self.max_users = max_users
+        self.warn_depth = warn_depth
+        self.warn_interval = warn_interval
+        self.locks = OrderedDict()
+        self.contended = 0
+        self.max_depth = 0
+        self.evicted = 0
+
+    def _entry(self, key):
+        entry = self.locks.get(key)
+        if entry is None:
+            entry = self.locks[key] = UserLock()
+            self._evict()
+        else:
+            self.locks.move_to_end(key)
+        return entry
+
+    def _evict(self):
+        while len(self.locks) > self.max_users:
+            idle = next((key for key, entry in self.locks.items() if not entry.pending), None)
+            if idle is None:
+                return
+            del self.locks[idle]
+            self.evicted += 1
+
+    @property
+    def metrics(self):
+        return {
+            "users": len(self.locks),
+            "queued": sum(entry.pending - 1 for entry in self.locks.values() if entry.pending > 1),
+            "contended": self.contended,
+            "max_depth": self.max_depth,
+            "evicted": self.evicted,
+        }
+
+    async def watch(self, interval=60.0):
+        while True:
+            await asyncio.sleep(interval)
+            metrics = self.metrics
+            logger.info(
+                f"User locks: {metrics['users']} tracked, {metrics['queued']} updates queued, "
+                f"{metrics['contended']} contended (max depth {metrics['max_depth']}), {metrics['evicted']} evicted"
+            )
+
+    @asynccontextmanager
+    async def lock(self, key):
+        entry = self._entry(key)
+        depth = entry.pending
+        entry.pending += 1
+        if depth:
+            self.contended += 1
+            self.max_depth = max(self.max_depth, depth)
+            now = time.monotonic()
+            if depth >= self.warn_depth and (entry.warned_at is None or now - entry.warned_at >= self.warn_interval):
+                entry.warned_at = now
+                logger.warning(f"User {key.user_id} has {depth} updates queued behind the one in progress")
+            else:
+                logger.debug(f"Update from user {key.user_id} waits behind {depth} update(s)")
+        try:
+            async with entry.lock:
+                yield
+        finally:
+            entry.pending -= 1
+
+    async def close(self):
+        self.locks.clear()
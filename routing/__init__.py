@@ -0,0 +1,2 @@
+from .button_router import ANY_STATE, ButtonRouter, is_media
+from .registry import HandlerRegistry
\ No newline at end of file
@@ -0,0 +1,95 @@
+import logging
+from itertools import count
+from aiogram.dispatcher.event.bases import SkipHandler
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.fsm.state import State
+
+logger = logging.getLogger(__name__)
+
+ANY_STATE = "*"
+
+def is_media(message):
+    return bool(message.sticker or message.photo or message.video or message.animation)
+
+class Route:
+    __slots__ = ("priority", "name", "callback", "conditional", "keys")
+
+    def __init__(self, priority, callback, conditional, keys):
+        self.priority = priority
+        self.name = f"{callback.__module__}.{callback.__qualname__}"
+        self.callback = CallableObject(callback)
+        self.conditional = conditional
+        self.keys = keys
+
+class ButtonRouter:
+    def __init__(self, name=None, priorities=None):
+        self.name = name
+        self.routes = {}
+        self._priority = priorities or count()
+        self._ignore_case_lengths = set()
+
+    def _state_key(self, state):
+        return state.state if isinstance(state, State) else state
+
+    def _add(self, keys, callback, conditional=False):
+        route = Route(next(self._priority), callback, conditional, keys)
+        for key in keys:
+            self.routes.setdefault(key, []).append(route)
+        return callback
+
+    def iter_routes(self):
+        seen = set()
+        for routes in self.routes.values():
+            for route in routes:
+                if route.priority not in seen:
+                    seen.add(route.priority)
+                    yield route
+
+    def button(self, *texts, state=ANY_STATE, ignore_case=False, conditional=False):
+        state = self._state_key(state)
+        keys = []
+        for text in texts:
+            if text is None:
+                logger.warning(f"Skipping button route without text in state {state}")
+            elif ignore_case:
+                self._ignore_case_lengths.add(len(text))
+                keys.append(("text_ci", text.lower(), state))
+            else:
+                keys.append(("text", text, state))
+        return lambda callback: self._add(keys, callback, conditional)
+
+    def command(self, name, state=ANY_STATE, conditional=False):
+        return lambda callback: self._add([("command", name, self._state_key(state))], callback, conditional)
+
+    def media(self, state=ANY_STATE, conditional=False):
+        return lambda callback: self._add([("media", self._state_key(state))], callback, conditional)
+
+    def any(self, state=ANY_STATE, conditional=False):
+        return lambda callback: self._add([("any", self._state_key(state))], callback, conditional)
+
+    def _keys(self, text, raw_state, media):
+        for state in (raw_state, ANY_STATE):
+            if text is not None:
+                yield ("text", text, state)
+                if len(text) in self._ignore_case_lengths:
+                    yield ("text_ci", text.lower(), state)
+                if text.startswith("/"):
+                    yield ("command", text.split(maxsplit=1)[0][1:].split("@", 1)[0], state)
+            if media:
+                yield ("media", state)
+            yield ("any", state)
+
+    def resolve(self, text, raw_state, media=False):
+        candidates = []
+        for key in self._keys(text, raw_state, media):
+            candidates.extend(self.routes.get(key, ()))
+        candidates.sort(key=lambda route: route.priority)
+        return candidates
+
+    async def dispatch(self, message, raw_state=None, **data):
+        for route in self.resolve(message.text, raw_state, is_media(message)):
+            try:
+                return await route.callback.call(message, raw_state=raw_state, **data)
+            except SkipHandler:
+                continue
+        raise SkipHandler()
@@ -0,0 +1,97 @@
+import logging
+from itertools import count
+from aiogram import Router
+from routing.button_router import ANY_STATE, ButtonRouter
+
+logger = logging.getLogger(__name__)
+
+def covers(key, other):
+    kind, state = key[0], key[-1]
+    if kind == "any":
+        return state == ANY_STATE or state == other[-1]
+    if state != ANY_STATE and state != other[-1]:
+        return False
+    if kind == "text_ci":
+        return other[0] in ("text", "text_ci") and other[1].lower() == key[1]
+    return kind == other[0] and key[1:-1] == other[1:-1]
+
+class HandlerRegistry:
+    def __init__(self, dp, max_chain=10):
+        self.dp = dp
+        self.max_chain = max_chain
+        self.routers = {}
+        self.button_routers = {}
+        self._priorities = count()
+
+    def include(self, name, register_fn, *args):
+        if name in self.routers:
+            raise ValueError(f"Router {name} is already registered")
+        router = Router(name=name)
+        routes = ButtonRouter(name=name, priorities=self._priorities)
+        router.message()(routes.dispatch)
+        register_fn(routes, *args)
+        self.dp.include_router(router)
+        self.routers[name] = router
+        self.button_routers[name] = routes
+        logger.info(f"Router {name} registered with {sum(1 for _ in routes.iter_routes())} routes")
+        return router
+
+    def iter_routes(self):
+        routes = [route for router in self.button_routers.values() for route in router.iter_routes()]
+        return sorted(routes, key=lambda route: route.priority)
+
+    def find_duplicates(self):
+        duplicates = []
+        seen = {}
+        for route in self.iter_routes():
+            for key in route.keys:
+                previous = seen.setdefault((route.name, key), route)
+                if previous is not route:
+                    duplicates.append((route.name, key))
+        return duplicates
+
+    def find_shadowed(self):
+        shadowed = []
+        active = []
+        for route in self.iter_routes():
+            blockers = {}
+            for key in route.keys:
+                blocker = next((other for other, other_key in active if covers(other_key, key)), None)
+                if blocker:
+                    blockers[key] = blocker
+            if blockers:
+                shadowed.append((route, blockers, len(blockers) == len(route.keys)))
+            if not route.conditional:
+                active.extend((route, key) for key in route.keys)
+        return shadowed
+
+    def chain_report(self):
+        report = {}
+        for update_type in self.dp.observers:
+            if update_type == "update":
+                continue
+            handlers = filters = 0
+            for router in self.dp.chain_tail:
+                observer = router.observers[update_type]
+                handlers += len(observer.handlers)
+                filters += sum(len(handler.filters or ()) for handler in observer.handlers)
+            if handlers:
+                report[update_type] = (handlers, filters)
+        return report
+
+    def check(self):
+        duplicates = self.find_duplicates()
+        if duplicates:
+            details = ", ".join(f"{name} {key}" for name, key in duplicates)
+            raise ValueError(f"Duplicate handler registrations: {details}")
+        for route, blockers, unreachable in self.find_shadowed():
+            for key, blocker in blockers.items():
+                logger.warning(f"Route {route.name} {key} is shadowed by {blocker.name}")
+            if unreachable:
+                logger.warning(f"Route {route.name} is unreachable")
+        routes = len(self.iter_routes())
+        for update_type, (handlers, filters) in self.chain_report().items():
+            extra = f", {routes} button routes" if update_type == "message" else ""
+            logger.info(f"Update type {update_type}: {handlers} handlers, {filters} filters in chain{extra}")
+            if handlers > self.max_chain:
+                logger.warning(f"Update type {update_type} walks {handlers} handlers, more than {self.max_chain}")
@@ -0,0 +1,75 @@
+import argparse
+import asyncio
+import itertools
+import os
+import statistics
+import time
+import aiohttp
+
+TEXTS = ["/start", "Інформація про CTF 🚩", "Хто такі BEST Lviv❓", "Моя команда 🫱🏻‍🫲🏿", "hello"]
+
+def build_update(update_id, user_id, text):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": f"Load {user_id}"},
+            "text": text
+        }
+    }
+
+async def post_updates(args):
+    headers = {"X-Telegram-Bot-Api-Secret-Token": args.secret}
+    texts = itertools.cycle(TEXTS)
+    update_ids = itertools.count(1)
+    latencies = []
+    errors = 0
+    queue = asyncio.Queue()
+    for _ in range(args.count):
+        update_id = next(update_ids)
+        queue.put_nowait(build_update(update_id, args.first_user_id + update_id % args.users, next(texts)))
+
+    async def worker(session):
+        nonlocal errors
+        while not queue.empty():
+            update = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.post(args.url, json=update, headers=headers) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except aiohttp.ClientError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    async with aiohttp.ClientSession() as session:
+        async with session.post(args.url, json=build_update(0, args.first_user_id, "/start"), headers={"X-Telegram-Bot-Api-Secret-Token": "wrong"}) as response:
+            print(f"Wrong secret token -> HTTP {response.status}")
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(session) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"Posted {args.count} updates from {args.users} users in {elapsed:.2f}s ({args.count / elapsed:.0f} updates/s), {errors} errors")
+    print(
+        f"Latency ms: p50 {statistics.median(latencies) * 1000:.1f}, "
+        f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}, "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}, "
+        f"max {latencies[-1] * 1000:.1f}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Post synthetic updates to a locally running webhook server")
+    parser.add_argument("--url", default=f"http://127.0.0.1:{os.getenv('WEBHOOK_PORT', '8080')}{os.getenv('WEBHOOK_PATH', '/webhook')}")
+    parser.add_argument("--secret", default=os.getenv("WEBHOOK_SECRET", ""))
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--first-user-id", type=int, default=10_000_000)
+    asyncio.run(post_updates(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,8 @@
+from .rate_limit import TokenBucket
+from .outbound import LANES, OutboundScheduler, request_lane, use_lane
+from .broadcast import BroadcastEngine
+from .notifications import TeamNotifier
+from .assets import AssetInfo, AssetRegistry, AssetStore
+from .asset_optimizer import AssetOptimizer
+from .webhook import register_webhook, run_webhook
+from .worker_pool import WorkerPool, consume_updates, poll_updates, serve_webhook
\ No newline at end of file
@@ -0,0 +1,70 @@
+import hashlib
+import logging
+import os
+from io import BytesIO
+from services.assets import AssetInfo
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+OPTIMIZABLE_TYPES = {"image/png", "image/jpeg"}
+JPEG_QUALITIES = [85, 75, 65, 55, 45]
+MIN_SIDE = 640
+
+class AssetOptimizer:
+    def __init__(self, cache_path, max_bytes=200_000):
+        self.cache_path = cache_path
+        self.max_bytes = max_bytes
+        if Image is None:
+            logger.warning("Pillow is not installed, images will be sent without optimization")
+
+    def _encode(self, image):
+        data = None
+        while True:
+            for quality in JPEG_QUALITIES:
+                buffer = BytesIO()
+                image.save(buffer, format="JPEG", quality=quality, optimize=True, progressive=True)
+                data = buffer.getvalue()
+                if len(data) <= self.max_bytes:
+                    return data
+            if min(image.size) <= MIN_SIDE:
+                return data
+            image = image.resize((int(image.width * 0.85), int(image.height * 0.85)), Image.LANCZOS)
+
+    def _build(self, asset, path):
+        with Image.open(asset.path) as source:
+            image = source.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        data = self._encode(background)
+        if len(data) >= asset.size:
+            return None
+        os.makedirs(self.cache_path, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        logger.info(f"Optimized {asset.name}: {asset.size} -> {len(data)} bytes")
+        return data
+
+    def optimize(self, asset):
+        if Image is None or asset.mime_type not in OPTIMIZABLE_TYPES:
+            return None
+        path = os.path.join(self.cache_path, f"{asset.content_hash}-{self.max_bytes}.jpg")
+        try:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    data = f.read()
+            else:
+                data = self._build(asset, path)
+                if data is None:
+                    logger.info(f"Asset {asset.name} is already within budget, sending the original")
+                    return None
+            return AssetInfo(asset.name, path, len(data), os.stat(path).st_mtime_ns, hashlib.sha256(data).hexdigest(), "image/jpeg")
+        except Exception as e:
+            logger.error(f"Failed to optimize asset {asset.name}: {e}")
+            return None
@@ -0,0 +1,132 @@
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import os
+from dataclasses import dataclass, replace
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.types import FSInputFile
+
+logger = logging.getLogger(__name__)
+
+EXPECTED_ASSETS = [
+    "best.png", "chat.png", "ctf.png", "findTeam.png", "register.png", "test.png", "test_task.pdf", "main_task.pdf"
+]
+
+@dataclass(slots=True, frozen=True)
+class AssetInfo:
+    name: str
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    mime_type: str = None
+    optimized: "AssetInfo" = None
+
+class AssetRegistry:
+    def __init__(self, assets_path, poll_interval=5.0, optimizer=None):
+        self.assets_path = assets_path
+        self.poll_interval = poll_interval
+        self.optimizer = optimizer
+        self.assets = {}
+
+    def _load(self, entry):
+        stat = entry.stat()
+        current = self.assets.get(entry.name)
+        if current and current.mtime_ns == stat.st_mtime_ns and current.size == stat.st_size:
+            return current
+        with open(entry.path, "rb") as f:
+            content_hash = hashlib.sha256(f.read()).hexdigest()
+        info = AssetInfo(entry.name, entry.path, stat.st_size, stat.st_mtime_ns, content_hash, mimetypes.guess_type(entry.name)[0])
+        if self.optimizer:
+            info = replace(info, optimized=self.optimizer.optimize(info))
+        return info
+
+    def scan(self):
+        assets = {}
+        try:
+            with os.scandir(self.assets_path) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.startswith("."):
+                        assets[entry.name] = self._load(entry)
+        except FileNotFoundError:
+            logger.error(f"Assets directory {self.assets_path} not found")
+        for name, info in assets.items():
+            current = self.assets.get(name)
+            if current is None:
+                logger.info(f"Asset {name} registered ({info.size} bytes, {info.mime_type})")
+            elif current.content_hash != info.content_hash:
+                logger.info(f"Asset {name} changed ({info.size} bytes)")
+        for name in self.assets.keys() - assets.keys():
+            logger.warning(f"Asset {name} was removed")
+        self.assets = assets
+        return assets
+
+    def check_expected(self, names=EXPECTED_ASSETS):
+        missing = [name for name in names if name not in self.assets]
+        if missing:
+            logger.warning(f"Missing assets in {self.assets_path}: {', '.join(missing)}")
+        return missing
+
+    def get(self, name):
+        return self.assets.get(name)
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await asyncio.to_thread(self.scan)
+            except Exception as e:
+                logger.error(f"Error rescanning assets in {self.assets_path}: {e}")
+
+class AssetStore:
+    def __init__(self, db, registry):
+        self.db = db
+        self.registry = registry
+        self._file_ids = {}
+
+    async def _get_file_id(self, content_hash, kind):
+        key = (content_hash, kind)
+        if key not in self._file_ids:
+            self._file_ids[key] = await self.db.get_asset_file_id(content_hash, kind)
+        return self._file_ids[key]
+
+    async def send(self, message, name, kind, caption=None):
+        asset = self.registry.get(name)
+        if asset is None:
+            raise FileNotFoundError(name)
+        if kind == "photo" and asset.optimized:
+            asset = asset.optimized
+        content_hash = asset.content_hash
+        key = (content_hash, kind)
+        file_id = await self._get_file_id(content_hash, kind)
+        answer = message.answer_photo if kind == "photo" else message.answer_document
+        if file_id:
+            try:
+                return await answer(**{kind: file_id}, caption=caption)
+            except TelegramBadRequest as e:
+                logger.warning(f"Cached file_id for {name} was rejected, uploading it again: {e}")
+                self._file_ids.pop(key, None)
+                await self.db.delete_asset_file_id(content_hash, kind)
+        sent = await answer(**{kind: FSInputFile(path=asset.path)}, caption=caption)
+        file_id = sent.photo[-1].file_id if kind == "photo" else sent.document.file_id
+        self._file_ids[key] = file_id
+        await self.db.save_asset_file_id(content_hash, kind, name, file_id)
+        logger.info(f"Uploaded asset {name}, cached file_id for {content_hash[:12]}")
+        return sent
+
+    async def _answer(self, message, name, kind, caption, label, on_error):
+        try:
+            await self.send(message, name, kind, caption)
+        except FileNotFoundError:
+            logger.error(f"Asset {name} is not available in {self.registry.assets_path}")
+            await message.answer(f"‼️ Виникла помилка: {label[0]} {name} не знайдено. {on_error}")
+        except Exception as e:
+            logger.error(f"Failed to send {name}: {str(e)}")
+            await message.answer(f"‼️ Виникла помилка при відправці {label[1]}: {str(e)}. {on_error}")
+
+    async def answer_photo(self, message, name, caption=None, on_error="Але не хвилюйся, продовжимо!"):
+        await self._answer(message, name, "photo", caption, ("зображення", "зображення"), on_error)
+
+    async def answer_document(self, message, name, caption=None, on_error="Але не хвилюйся, продовжимо!"):
+        await self._answer(message, name, "document", caption, ("файл", "файлу"), on_error)
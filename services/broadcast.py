@@ -0,0 +1,236 @@
+import asyncio
+import logging
+import os
+import secrets
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from services.outbound import use_lane
+
+logger = logging.getLogger(__name__)
+
+PERMANENT_ERRORS = (TelegramBadRequest, LookupError, TypeError, ValueError)
+
+class BroadcastStats:
+    def __init__(self, total=0, sent=0, failed=0):
+        self.total = total
+        self.sent = sent
+        self.failed = failed
+        self.delivered_buffer = []
+        self.failed_buffer = []
+        self.done = False
+
+    @property
+    def processed(self):
+        return self.sent + self.failed
+
+class BroadcastEngine:
+    def __init__(self, bot, db, concurrency=10, progress_interval=10.0, flush_size=50, batch_size=500, lease=60.0, max_attempts=3):
+        self.bot = bot
+        self.db = db
+        self.concurrency = concurrency
+        self.progress_interval = progress_interval
+        self.flush_size = flush_size
+        self.batch_size = batch_size
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{secrets.token_hex(4)}"
+        self._tasks = set()
+        self._running = set()
+        self._flush_lock = asyncio.Lock()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    def start(self, text, admin_chat_id):
+        return self._spawn(self._run_new(text, admin_chat_id))
+
+    def _lease_until(self):
+        return datetime.now(timezone.utc) + timedelta(seconds=self.lease)
+
+    async def resume(self):
+        resumed = 0
+        for job in await self.db.get_unfinished_broadcast_jobs():
+            if job["_id"] in self._running:
+                continue
+            job = await self.db.claim_broadcast_job(job["_id"], self.owner, self._lease_until())
+            if job is None:
+                continue
+            logger.info(f"Resuming broadcast job {job['_id']} ({job['status']})")
+            self._spawn(self._run_job(job))
+            resumed += 1
+        return resumed
+
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.lease)
+            try:
+                await self.resume()
+            except Exception as e:
+                logger.error(f"Error resuming broadcast jobs: {e}")
+
+    async def _keep_lease(self, job_id, job_task):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                renewed = await self.db.renew_broadcast_lease(job_id, self.owner, self._lease_until())
+            except Exception as e:
+                logger.error(f"Error renewing lease of broadcast job {job_id}: {e}")
+                continue
+            if not renewed:
+                logger.error(f"Lost the lease of broadcast job {job_id}, stopping it")
+                job_task.cancel()
+                return
+
+    async def _send(self, chat_id, text):
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+            return True
+        except TelegramRetryAfter as e:
+            logger.warning(f"Flood limit kept hitting chat {chat_id} while broadcasting (retry after {e.retry_after}s), skipping it")
+        except TelegramForbiddenError:
+            logger.warning(f"Chat {chat_id} blocked the bot, suppressing it.")
+            await self.db.suppress_chat(chat_id)
+        except Exception as e:
+            logger.error(f"Error sending broadcast to chat {chat_id}: {e}")
+        return False
+
+    async def _flush(self, job_id, stats):
+        async with self._flush_lock:
+            delivered, stats.delivered_buffer = stats.delivered_buffer, []
+            failed, stats.failed_buffer = stats.failed_buffer, []
+            if delivered or failed:
+                await self.db.update_broadcast_progress(job_id, delivered, failed)
+
+    async def _worker(self, job_id, queue, text, stats):
+        with use_lane("bulk"):
+            while True:
+                recipient = await queue.get()
+                if recipient is None:
+                    return
+                chat_id = recipient["chat_id"]
+                if await self._send(chat_id, text):
+                    stats.sent += 1
+                    stats.delivered_buffer.append(chat_id)
+                else:
+                    stats.failed += 1
+                    stats.failed_buffer.append(chat_id)
+                if len(stats.delivered_buffer) + len(stats.failed_buffer) >= self.flush_size:
+                    await self._flush(job_id, stats)
+
+    async def _notify(self, admin_chat_id, text):
+        try:
+            with use_lane("notification"):
+                await self.bot.send_message(chat_id=admin_chat_id, text=text)
+        except Exception as e:
+            logger.error(f"Error notifying admin {admin_chat_id} about broadcast: {e}")
+
+    async def _report_progress(self, admin_chat_id, stats):
+        started_at = time.monotonic()
+        started_with = stats.processed
+        while not stats.done:
+            await asyncio.sleep(self.progress_interval)
+            if stats.done:
+                return
+            elapsed = time.monotonic() - started_at
+            await self._notify(
+                admin_chat_id,
+                f"Розсилка триває: оброблено {stats.processed}/{stats.total}, помилок: {stats.failed} ({(stats.processed - started_with) / elapsed:.1f} повідомлень/с)."
+            )
+
+    async def _prepare(self, job_id):
+        await self.db.reset_broadcast_recipients(job_id)
+        total = 0
+        skipped = 0
+        batch = []
+        async for participant in self.db.iter_participants({"_id": 0, "user_id": 1, "chat_id": 1}, reachable_only=True):
+            total += 1
+            if "chat_id" not in participant:
+                logger.warning(f"No chat_id for user {participant.get('user_id')}, skipping.")
+                skipped += 1
+                continue
+            batch.append(participant)
+            if len(batch) >= self.batch_size:
+                await self.db.add_broadcast_recipients(job_id, batch)
+                batch = []
+        await self.db.add_broadcast_recipients(job_id, batch)
+        await self.db.start_broadcast_job(job_id, total, skipped)
+        return BroadcastStats(total=total, failed=skipped)
+
+    async def _run_new(self, text, admin_chat_id):
+        try:
+            job_id = await self.db.create_broadcast_job(text, admin_chat_id, self.owner, self._lease_until())
+        except Exception as e:
+            logger.error(f"Error creating broadcast job: {e}")
+            await self._notify(admin_chat_id, "Виникла помилка під час розсилки.")
+            return None
+        return await self._run_job({"_id": job_id, "text": text, "admin_chat_id": admin_chat_id, "status": "preparing", "attempts": 1})
+
+    async def _run_job(self, job):
+        job_id = job["_id"]
+        admin_chat_id = job["admin_chat_id"]
+        stats = None
+        workers = []
+        reporter = None
+        settled = False
+        self._running.add(job_id)
+        keeper = asyncio.create_task(self._keep_lease(job_id, asyncio.current_task()))
+        try:
+            if job["status"] == "preparing":
+                stats = await self._prepare(job_id)
+            else:
+                stats = BroadcastStats(total=job.get("total", 0), sent=job.get("sent", 0), failed=job.get("failed", 0))
+            queue = asyncio.Queue(maxsize=self.concurrency * 2)
+            workers = [asyncio.create_task(self._worker(job_id, queue, job["text"], stats)) for _ in range(self.concurrency)]
+            reporter = asyncio.create_task(self._report_progress(admin_chat_id, stats))
+            async for recipient in self.db.iter_pending_broadcast_recipients(job_id):
+                await queue.put(recipient)
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+            await self._flush(job_id, stats)
+            await self.db.finish_broadcast_job(job_id)
+            settled = True
+            logger.info(f"Broadcast job {job_id} finished: {stats.sent}/{stats.total} delivered")
+            await self._notify(admin_chat_id, f"Розсилка завершена. Успішно надіслано: {stats.sent}/{stats.total}.")
+        except Exception as e:
+            attempts = job.get("attempts", 1)
+            if isinstance(e, PERMANENT_ERRORS) or attempts >= self.max_attempts:
+                logger.error(f"Broadcast job {job_id} failed on attempt {attempts}, giving up: {e}")
+                try:
+                    await self.db.fail_broadcast_job(job_id, str(e))
+                    settled = True
+                except Exception as fail_error:
+                    logger.error(f"Error giving up on broadcast job {job_id}: {fail_error}")
+                await self._notify(admin_chat_id, "Виникла помилка під час розсилки.")
+            else:
+                logger.error(f"Broadcast job {job_id} failed on attempt {attempts}/{self.max_attempts}, will retry: {e}")
+        finally:
+            keeper.cancel()
+            for worker in workers:
+                worker.cancel()
+            if reporter:
+                reporter.cancel()
+            if stats:
+                stats.done = True
+                try:
+                    await self._flush(job_id, stats)
+                except Exception as e:
+                    logger.error(f"Error saving progress of broadcast job {job_id}: {e}")
+            if not settled:
+                try:
+                    await self.db.release_broadcast_job(job_id, self.owner)
+                except Exception as e:
+                    logger.error(f"Error releasing broadcast job {job_id}: {e}")
+            self._running.discard(job_id)
+        return stats
+
+    async def stop(self):
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,47 @@
+import asyncio
+import logging
+from aiogram.exceptions import TelegramForbiddenError
+from services.outbound import use_lane
+
+logger = logging.getLogger(__name__)
+
+class TeamNotifier:
+    def __init__(self, bot, db):
+        self.bot = bot
+        self.db = db
+        self._tasks = set()
+
+    def notify(self, team_name, member_ids, text, exclude=None):
+        task = asyncio.create_task(self.deliver(team_name, [member_id for member_id in member_ids if member_id != exclude], text))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _send(self, user_id, chat_id, text):
+        try:
+            await self.bot.send_message(chat_id=chat_id, text=text, parse_mode="Markdown")
+            return True
+        except TelegramForbiddenError:
+            logger.warning(f"Chat {chat_id} of user {user_id} blocked the bot, suppressing it.")
+            await self.db.suppress_chat(chat_id)
+        except Exception as e:
+            logger.error(f"Error sending notification to user {user_id}: {e}")
+        return False
+
+    async def deliver(self, team_name, member_ids, text):
+        if not member_ids:
+            return 0, 0
+        try:
+            chat_ids = await self.db.get_member_chat_ids(member_ids)
+        except Exception as e:
+            logger.error(f"Error resolving chat ids for team {team_name}: {e}")
+            return 0, len(member_ids)
+        for member_id in member_ids:
+            if member_id not in chat_ids:
+                logger.warning(f"No reachable chat_id for user {member_id} in team {team_name}")
+        with use_lane("notification"):
+            results = await asyncio.gather(*(self._send(user_id, chat_id, text) for user_id, chat_id in chat_ids.items()))
+        sent = sum(results)
+        failed = len(member_ids) - sent
+        logger.info(f"Notified team {team_name}: {sent} sent, {failed} failed")
+        return sent, failed
@@ -0,0 +1,126 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import count
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from services.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+LANES = ["interactive", "notification", "bulk"]
+
+request_lane = ContextVar("request_lane", default="interactive")
+
+@contextmanager
+def use_lane(lane):
+    token = request_lane.set(lane)
+    try:
+        yield
+    finally:
+        request_lane.reset(token)
+
+class OutboundScheduler(BaseRequestMiddleware):
+    def __init__(self, global_rate=30.0, global_burst=5, chat_rate=1.0, chat_burst=3, lane_rates=None, max_retries=3, max_chats=10000):
+        self.interval = 1 / global_rate
+        self.global_burst = global_burst
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.lane_buckets = {lane: TokenBucket(rate) for lane, rate in (lane_rates or {}).items() if rate}
+        self.max_retries = max_retries
+        self.max_chats = max_chats
+        self.chats = OrderedDict()
+        self.sent = Counter()
+        self.waited = Counter()
+        self.retries = 0
+        self._waiters = []
+        self._sequence = count()
+        self._next_slot = 0.0
+        self._granter = None
+
+    def _chat(self, chat_id):
+        bucket = self.chats.get(chat_id)
+        if bucket is None:
+            bucket = self.chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+            now = time.monotonic()
+            while len(self.chats) > self.max_chats:
+                oldest_id, oldest = next(iter(self.chats.items()))
+                if now - oldest.updated_at < self.chat_burst / self.chat_rate or now < oldest.paused_until:
+                    break
+                del self.chats[oldest_id]
+        else:
+            self.chats.move_to_end(chat_id)
+        return bucket
+
+    async def _grant(self):
+        while self._waiters:
+            now = time.monotonic()
+            if now < self._next_slot:
+                await asyncio.sleep(self._next_slot - now)
+                continue
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            future.set_result(None)
+            self._next_slot = max(self._next_slot, now - self.global_burst * self.interval) + self.interval
+
+    async def _acquire_global(self, lane):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (LANES.index(lane), next(self._sequence), future))
+        if self._granter is None or self._granter.done():
+            self._granter = asyncio.create_task(self._grant())
+        await future
+
+    @property
+    def metrics(self):
+        return {
+            "sent": dict(self.sent),
+            "average_wait_ms": {lane: self.waited[lane] * 1000 / self.sent[lane] for lane in self.sent},
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "retries": self.retries,
+            "chats": len(self.chats),
+        }
+
+    async def watch(self, interval=60.0):
+        while True:
+            await asyncio.sleep(interval)
+            metrics = self.metrics
+            waits = ", ".join(f"{lane} {wait:.0f}ms" for lane, wait in metrics["average_wait_ms"].items())
+            logger.info(
+                f"Outbound requests: sent {metrics['sent']}, average wait {waits or 'n/a'}, "
+                f"{metrics['queued']} queued, {metrics['retries']} flood retries, {metrics['chats']} chats tracked"
+            )
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        lane = request_lane.get()
+        lane_bucket = self.lane_buckets.get(lane)
+        attempt = 0
+        while True:
+            started_at = time.monotonic()
+            if lane_bucket:
+                await lane_bucket.acquire()
+            chat = self._chat(chat_id)
+            await chat.acquire()
+            await self._acquire_global(lane)
+            self.waited[lane] += time.monotonic() - started_at
+            try:
+                result = await make_request(bot, method)
+                self.sent[lane] += 1
+                return result
+            except TelegramRetryAfter as e:
+                attempt += 1
+                self.retries += 1
+                if attempt > self.max_retries:
+                    logger.error(f"Giving up on {type(method).__name__} to chat {chat_id} after {self.max_retries} flood retries")
+                    raise
+                logger.warning(f"Flood limit hit for chat {chat_id} in {lane} lane, retrying in {e.retry_after}s")
+                chat.pause(e.retry_after)
+                if lane_bucket:
+                    lane_bucket.pause(e.retry_after)
@@ -0,0 +1,28 @@
+import asyncio
+import logging
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+logger = logging.getLogger(__name__)
+
+async def register_webhook(bot, base_url, path, secret_token, allowed_updates=None):
+    url = f"{base_url.rstrip('/')}{path}"
+    await bot.set_webhook(url, secret_token=secret_token, allowed_updates=allowed_updates)
+    logger.info(f"Webhook registered at {url}")
+
+async def run_webhook(dp, bot, host, port, path, secret_token, base_url=None):
+    app = web.Application()
+    setup_application(app, dp, bot=bot)
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=secret_token, handle_in_background=True).register(app, path=path)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"Webhook server listening on {host}:{port}{path}")
+        if base_url:
+            await register_webhook(bot, base_url, path, secret_token, allowed_updates=dp.resolve_used_update_types())
+        else:
+            logger.warning("WEBHOOK_URL is not set, only locally posted updates will be handled")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import multiprocessing
+import secrets
+import aiohttp
+from aiohttp import web
+from aiogram.client.telegram import PRODUCTION
+
+logger = logging.getLogger(__name__)
+
+def update_user_id(update):
+    for key, value in update.items():
+        if key != "update_id" and isinstance(value, dict):
+            user = value.get("from") or value.get("user") or {}
+            chat = value.get("chat") or (value.get("message") or {}).get("chat") or {}
+            return user.get("id") or chat.get("id") or update["update_id"]
+    return update.get("update_id", 0)
+
+class WorkerPool:
+    def __init__(self, target, workers, check_interval=1.0):
+        self.target = target
+        self.workers = workers
+        self.check_interval = check_interval
+        self.context = multiprocessing.get_context("spawn")
+        self.queues = [self.context.Queue() for _ in range(workers)]
+        self.processes = [None] * workers
+        self.dispatched = [0] * workers
+        self.restarts = 0
+        self._stopping = False
+
+    def _start_worker(self, index):
+        process = self.context.Process(target=self.target, args=(index, self.queues[index]), name=f"bot-worker-{index}")
+        process.start()
+        self.processes[index] = process
+        logger.info(f"Started worker {index} (pid {process.pid})")
+
+    def start(self):
+        for index in range(self.workers):
+            self._start_worker(index)
+
+    def dispatch(self, update):
+        index = update_user_id(update) % self.workers
+        self.queues[index].put_nowait(update)
+        self.dispatched[index] += 1
+
+    async def watch(self):
+        while not self._stopping:
+            await asyncio.sleep(self.check_interval)
+            for index, process in enumerate(self.processes):
+                if process.exitcode is not None and not self._stopping:
+                    logger.error(f"Worker {index} (pid {process.pid}) exited with code {process.exitcode}, restarting it")
+                    self.restarts += 1
+                    self._start_worker(index)
+
+    def stop(self, timeout=30.0):
+        self._stopping = True
+        for queue in self.queues:
+            queue.put(None)
+        for index, process in enumerate(self.processes):
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"Worker {index} did not stop in {timeout}s, terminating it")
+                process.terminate()
+                process.join()
+        logger.info(f"Worker pool stopped, dispatched {sum(self.dispatched)} updates {self.dispatched}, {self.restarts} restarts")
+
+async def poll_updates(token, pool, timeout=30):
+    url = PRODUCTION.api_url(token=token, method="getUpdates")
+    offset = None
+    async with aiohttp.ClientSession() as session:
+        while True:
+            params = {"timeout": timeout}
+            if offset is not None:
+                params["offset"] = offset
+            try:
+                async with session.post(url, json=params, timeout=aiohttp.ClientTimeout(total=timeout + 10)) as response:
+                    payload = await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Error getting updates: {e}")
+                await asyncio.sleep(1)
+                continue
+            if not payload.get("ok"):
+                logger.error(f"Error getting updates: {payload.get('description')}")
+                await asyncio.sleep(payload.get("parameters", {}).get("retry_after", 1))
+                continue
+            for update in payload["result"]:
+                pool.dispatch(update)
+                offset = update["update_id"] + 1
+
+async def serve_webhook(pool, host, port, path, secret_token):
+    async def handle(request):
+        if not secrets.compare_digest(request.headers.get("X-Telegram-Bot-Api-Secret-Token", ""), secret_token):
+            return web.Response(status=401)
+        pool.dispatch(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        logger.info(f"Supervisor webhook server listening on {host}:{port}{path}")
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+async def _feed(dp, bot, update, previous):
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await dp.feed_raw_update(bot, update)
+    except Exception as e:
+        logger.error(f"Error handling update {update.get('update_id')}: {e}")
+
+async def consume_updates(dp, bot, queue):
+    tails = {}
+
+    def release(user_id, task):
+        if tails.get(user_id) is task:
+            del tails[user_id]
+
+    while True:
+        update = await asyncio.to_thread(queue.get)
+        if update is None:
+            break
+        user_id = update_user_id(update)
+        task = asyncio.create_task(_feed(dp, bot, update, tails.get(user_id)))
+        tails[user_id] = task
+        task.add_done_callback(lambda task, user_id=user_id: release(user_id, task))
+    if tails:
+        await asyncio.wait(list(tails.values()))